@@ -11,6 +11,9 @@ if TYPE_CHECKING:
 
 # Defines the Action class. This class does not have an __init__ method because the __init__ method is used to initialize the state of an object created by a class. The Action class is an abstract class, which means that it is not meant to be instantiated. It is meant to be inherited by other classes. The Action class is meant to be a base class for other classes to inherit from.
 class Action:
+    # An empty __slots__ on the base class is needed for the __slots__ of the subclasses to have any effect, otherwise every action would still get a __dict__.
+    __slots__ = ()
+
     # The perform method here acts as an abstact method, which means that it is meant to be overriden by subclasses. It serves as a placeholder, defining a method's signature(name, parameters, and return type) withoud providing any implementation details. This defines the methods that a subclass should implement, therefore helping enforce a certain structure or behavior across multiple subclasses (of the Action class)
     def perform(self, engine: Engine, entity: Entity) -> None:
         """Perform this action with the objects needed to determine its scope.
@@ -27,12 +30,24 @@ class Action:
 
 # The EscapeAction class inherits from the Action class via "(Action)". It overrides the perform method of the Action class.
 class EscapeAction(Action):
+    __slots__ = ()
+
     # The perform method of the EscapeAction class raises a SystemExit exception (which is a built in python exception). This exception is raised when the user presses the escape key. This exception is caught in the main function in the main.py file, which causes the game to exit.
     def perform(self, engine: Engine, entity: Entity) -> None:
         raise SystemExit()
 
+# The DescendAction class is a subclass of the Action class. It takes the player down to the next floor, which the engine swaps in from its level prefetcher.
+class DescendAction(Action):
+    __slots__ = ()
+
+    def perform(self, engine: Engine, entity: Entity) -> None:
+        engine.descend()
+
 # The MovementAction class is a subclass of the Action class. It overrides the perform method of the Action class.
 class MovementAction(Action):
+    # MovementAction only ever holds dx and dy, so they are stored in slots instead of a __dict__. Movement actions are never changed after they are created, which is what lets input_handlers.py create one per direction and hand the same object out on every keypress.
+    __slots__ = ("dx", "dy")
+
     # The __init__ method of the MovementAction class takes in two parameters, dx and dy, which are cast as integers.
     def __init__(self, dx: int, dy: int):
         # The super() function returns a temporary object of the superclass that allows you to call the superclass's methods. The Action class does not have an __init__ method so the super() function here does not return anything. It could be omitted and the code would still work.
@@ -42,14 +57,14 @@ class MovementAction(Action):
         self.dx = dx
         self.dy = dy
 
-    # The perform method here overrides the perform method of the Action class. It takes in two parameters, engine and entity, which are cast as the Engine and Entity classes respectively. The perform method of the MovementAction class is called when the player presses a movement key. The perform method of the MovementAction class takes in the engine and entity parameters, which are used to determine the scope of the action. The engine parameter is used to access the game_map attribute of the Engine class. The entity parameter is used to access the x and y attributes of the Entity class. The perform method of the MovementAction class checks if the destination tile is in bounds and walkable. If it is, the perform method of the MovementAction class calls the move method of the Entity class, which moves the entity to the destination tile. So the dest_x and dest_y calculations are made first. Then the destination tile is checked to see if it is in bounds (if not engine.game_map.in_bounds(dest_x, dest_y):) and walkable(engine.game_map.tiles["walkable"][dest_x, dest_y]). If it is, the entity is moved to the destination tile (entity.move(self.dx, self.dy)).
+    # The perform method here overrides the perform method of the Action class. It takes in two parameters, engine and entity, which are cast as the Engine and Entity classes respectively. The perform method of the MovementAction class is called when the player presses a movement key. The perform method of the MovementAction class takes in the engine and entity parameters, which are used to determine the scope of the action. The engine parameter is used to access the game_map attribute of the Engine class. The entity parameter is used to access the x and y attributes of the Entity class. The perform method of the MovementAction class checks if the destination tile is in bounds and walkable. If it is, the perform method of the MovementAction class calls the move method of the Entity class, which moves the entity to the destination tile. So the dest_x and dest_y calculations are made first. Then the destination tile is checked to see if it is in bounds (if not engine.game_map.in_bounds(dest_x, dest_y):) and walkable(engine.game_map.walkable[dest_x, dest_y], which reads the map's cached walkable array). If it is, the entity is moved to the destination tile (entity.move(self.dx, self.dy)).
     def perform(self, engine: Engine, entity: Entity) -> None:
         dest_x = entity.x + self.dx
         dest_y = entity.y + self.dy
 
         if not engine.game_map.in_bounds(dest_x, dest_y):
             return  # Destination is out of bounds.
-        if not engine.game_map.tiles["walkable"][dest_x, dest_y]:
+        if not engine.game_map.walkable[dest_x, dest_y]:
             return  # Destination is blocked by a tile.
 
         entity.move(self.dx, self.dy)
\ No newline at end of file
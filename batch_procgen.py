@@ -0,0 +1,108 @@
+# Generating a whole batch of dungeons with numpy, for workloads (like training and evaluation) which need maps in bulk. generate_dungeon places one room at a time in a Python loop, so generating N maps with it costs N times the Python overhead. Here every random number for every map is drawn up front, the rooms of all N maps are placed together one attempt at a time, and the rooms and tunnels are carved into one (N, width, height) array of tile IDs. The maps follow the same rules as generate_dungeon (same room sizes, same overlap test, L-shaped tunnels between consecutive rooms, the player starting in the first room), but the random numbers are drawn in a different order, so a seed doesn't give the same map it would give generate_dungeon.
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np  # type: ignore
+
+import tile_types
+from procgen import RNGLike
+
+# The rectangles are carved this many maps at a time, which keeps the memory used for carving bounded no matter how big the batch is.
+CARVE_BATCH_SIZE = 256
+
+
+def generate_dungeon_batch(
+    count: int,
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    map_width: int,
+    map_height: int,
+    rng: RNGLike = None,
+    out: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Generate `count` dungeons of the same size at once.
+
+    Returns the tile IDs of every map as a (count, map_width, map_height)
+    array and the player start positions as a (count, 2) array. The maps are
+    written into `out` if it is given. `rng` is a seed or an
+    `np.random.Generator`; the same seed always generates the same batch.
+    """
+    rng = np.random.default_rng(rng)
+    shape = (count, map_width, map_height)
+    if out is None:
+        out = np.empty(shape, dtype=tile_types.tile_id_dt)
+    elif out.shape != shape or out.dtype != tile_types.tile_id_dt:
+        raise ValueError(f"out must be a {shape} array of {tile_types.tile_id_dt}.")
+
+    # Every room attempt of every map, as (count, max_rooms) arrays. These are the same draws generate_dungeon makes for each attempt, including the coin flip deciding which way the tunnel to the room bends.
+    widths = rng.integers(room_min_size, room_max_size + 1, size=(count, max_rooms))
+    heights = rng.integers(room_min_size, room_max_size + 1, size=(count, max_rooms))
+    x1 = rng.integers(0, map_width - widths)
+    y1 = rng.integers(0, map_height - heights)
+    horizontal_first = rng.random((count, max_rooms)) < 0.5
+    x2 = x1 + widths
+    y2 = y1 + heights
+
+    # Place the rooms. Attempt i of every map is tested against the rooms that were accepted before it in the same map, using the same test as RectangularRoom.intersects. The loop runs once per attempt, not once per attempt per map.
+    accepted = np.zeros((count, max_rooms), dtype=bool)
+    accepted[:, :1] = True  # The first room always fits.
+    for i in range(1, max_rooms):
+        overlaps = (
+            (x1[:, :i] <= x2[:, i, None])
+            & (x2[:, :i] >= x1[:, i, None])
+            & (y1[:, :i] <= y2[:, i, None])
+            & (y2[:, :i] >= y1[:, i, None])
+            & accepted[:, :i]
+        )
+        accepted[:, i] = ~overlaps.any(axis=1)
+
+    center_x = (x1 + x2) // 2
+    center_y = (y1 + y2) // 2
+    # The player starts in the center of the first room.
+    starts = np.zeros((count, 2), dtype=np.int32)
+    if max_rooms:
+        starts[:, 0], starts[:, 1] = center_x[:, 0], center_y[:, 0]
+
+    # Every accepted room, in map order and then room order. A tunnel runs to each room from the room accepted before it in the same map.
+    map_index, room_index = np.nonzero(accepted)
+    linked = map_index[1:] == map_index[:-1]
+    tunnel_map = map_index[1:][linked]
+    from_room = room_index[:-1][linked]
+    to_room = room_index[1:][linked]
+    start_x, start_y = center_x[tunnel_map, from_room], center_y[tunnel_map, from_room]
+    end_x, end_y = center_x[tunnel_map, to_room], center_y[tunnel_map, to_room]
+    bend = horizontal_first[tunnel_map, to_room]
+    corner_x = np.where(bend, end_x, start_x)
+    corner_y = np.where(bend, start_y, end_y)
+
+    # Everything that gets dug is a rectangle: the inner area of each room, and each leg of a tunnel, which is a straight line one cell wide. The rectangles are (map, left, right, top, bottom) with inclusive ends.
+    rectangles = [
+        (map_index, x1[accepted] + 1, x2[accepted] - 1, y1[accepted] + 1, y2[accepted] - 1),
+        (tunnel_map, np.minimum(start_x, corner_x), np.maximum(start_x, corner_x), np.minimum(start_y, corner_y), np.maximum(start_y, corner_y)),
+        (tunnel_map, np.minimum(corner_x, end_x), np.maximum(corner_x, end_x), np.minimum(corner_y, end_y), np.maximum(corner_y, end_y)),
+    ]
+    n, left, right, top, bottom = (np.concatenate(column) for column in zip(*rectangles))
+
+    for first in range(0, count, CARVE_BATCH_SIZE):
+        last = min(first + CARVE_BATCH_SIZE, count)
+        in_batch = (n >= first) & (n < last)
+        _carve(out[first:last], n[in_batch] - first, left[in_batch], right[in_batch], top[in_batch], bottom[in_batch])
+
+    return out, starts
+
+
+# Carves rectangles into a stack of maps with a 2D difference array: each rectangle adds 1 at its top left corner, subtracts 1 just past its right and bottom edges and adds 1 back just past its bottom right corner. Summing the array along both axes then gives, for every cell, the number of rectangles covering it, so any number of rectangles is carved with a few whole-array operations.
+def _carve(
+    maps: np.ndarray, n: np.ndarray, left: np.ndarray, right: np.ndarray, top: np.ndarray, bottom: np.ndarray
+) -> None:
+    count, width, height = maps.shape
+    diff = np.zeros((count, width + 1, height + 1), dtype=np.int32)
+    np.add.at(diff, (n, left, top), 1)
+    np.add.at(diff, (n, right + 1, top), -1)
+    np.add.at(diff, (n, left, bottom + 1), -1)
+    np.add.at(diff, (n, right + 1, bottom + 1), 1)
+    covered = diff.cumsum(axis=1, dtype=np.int32).cumsum(axis=2, dtype=np.int32)[:, :width, :height] > 0
+    maps[...] = np.where(covered, tile_types.floor_id, tile_types.wall_id)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Memory and allocation benchmark for Entity, MovementAction and EntityPool.
+
+Compares the slotted Entity and the shared per-key MovementAction objects
+against the previous layout (a regular class with a __dict__, and a new
+MovementAction for every keypress), which are recreated here for reference.
+
+Run with: python bench_entities.py
+"""
+# tracemalloc tracks the memory allocated by python objects, which is what the benchmark measures.
+import tracemalloc
+
+# time.perf_counter is a high resolution clock used to time the turns.
+import time
+
+# importing the type hints used in this file from the typing module
+from typing import Any, Callable, List, Optional, Tuple
+
+import tcod.event
+
+import tile_types
+from actions import Action, MovementAction
+from engine import Engine
+from entity import Entity, EntityPool
+from game_map import GameMap
+from input_handlers import EventHandler
+
+ENTITY_COUNT = 100_000
+TURN_COUNT = 10_000
+SPAWN_CYCLES = 10_000
+
+
+# The Entity layout from before __slots__ was added, for comparison.
+class DictEntity:
+    def __init__(self, x: int, y: int, char: str, color: Tuple[int, int, int]):
+        self.x = x
+        self.y = y
+        self.char = char
+        self.color = color
+        self.spatial_index = None
+
+
+# A MovementAction with a __dict__, created fresh on every keypress like EventHandler used to do.
+class DictMovementAction(Action):
+    def __init__(self, dx: int, dy: int):
+        self.__dict__["dx"] = dx
+        self.__dict__["dy"] = dy
+
+    perform = MovementAction.perform
+
+
+class AllocatingEventHandler(EventHandler):
+    def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[Action]:
+        if event.sym == tcod.event.K_LEFT:
+            return DictMovementAction(dx=-1, dy=0)
+        if event.sym == tcod.event.K_RIGHT:
+            return DictMovementAction(dx=1, dy=0)
+        return super().ev_keydown(event)
+
+
+def bytes_per_entity(factory: Callable[..., Any]) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [factory(i % 80, i % 50, "@", (255, 255, 255)) for i in range(ENTITY_COUNT)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding the entities is not part of the cost of an entity.
+    list_bytes = len(entities) * 8
+    return (after - before - list_bytes) / len(entities)
+
+
+# Plays TURN_COUNT turns of walking left and right in an open room. Returns the number of distinct Action objects that were created per turn, the average number of bytes allocated (and freed again) during a turn, and the time per turn.
+def turn_allocations(handler: EventHandler) -> Tuple[float, float, float]:
+    game_map = GameMap(80, 50)
+    game_map.tiles[1:79, 1:49] = tile_types.floor
+    player = Entity(40, 25, "@", (255, 255, 255))
+    engine = Engine({player}, handler, game_map, player)
+    events = [
+        tcod.event.KeyDown(0, tcod.event.K_LEFT if i % 2 else tcod.event.K_RIGHT, 0) for i in range(TURN_COUNT)
+    ]
+
+    actions: List[Action] = []
+    transient = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    for event in events:
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        action = handler.dispatch(event)
+        action.perform(engine, player)
+        transient += tracemalloc.get_traced_memory()[1] - current
+        actions.append(action)
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    distinct = len({id(action) for action in actions})
+    return distinct / TURN_COUNT, transient / TURN_COUNT, elapsed / TURN_COUNT
+
+
+# Spawns and despawns one entity per cycle, either with a plain Entity every time or through an EntityPool. Returns the number of Entity objects created per cycle and the time per cycle.
+def spawn_churn(use_pool: bool) -> Tuple[float, float]:
+    pool = EntityPool()
+    seen = set()
+    keep = []
+    start = time.perf_counter()
+    for i in range(SPAWN_CYCLES):
+        if use_pool:
+            entity = pool.acquire(i % 80, i % 50, "g", (0, 255, 0))
+        else:
+            entity = Entity(i % 80, i % 50, "g", (0, 255, 0))
+        if id(entity) not in seen:
+            seen.add(id(entity))
+            keep.append(entity)  # Keeps ids unique by keeping every created entity alive.
+        if use_pool:
+            pool.release(entity)
+    elapsed = time.perf_counter() - start
+    return len(seen) / SPAWN_CYCLES, elapsed / SPAWN_CYCLES
+
+
+def main() -> None:
+    print(f"{'benchmark':<34}{'before':>14}{'after':>14}")
+    print(f"{'bytes per entity':<34}{bytes_per_entity(DictEntity):>14.1f}{bytes_per_entity(Entity):>14.1f}")
+
+    before = turn_allocations(AllocatingEventHandler())
+    after = turn_allocations(EventHandler())
+    print(f"{'action objects per turn':<34}{before[0]:>14.3f}{after[0]:>14.3f}")
+    print(f"{'transient bytes per turn':<34}{before[1]:>14.1f}{after[1]:>14.1f}")
+    print(f"{'microseconds per turn (traced)':<34}{before[2] * 1e6:>14.2f}{after[2] * 1e6:>14.2f}")
+
+    before_spawn = spawn_churn(use_pool=False)
+    after_spawn = spawn_churn(use_pool=True)
+    print(f"{'entity objects per spawn':<34}{before_spawn[0]:>14.3f}{after_spawn[0]:>14.3f}")
+    print(f"{'microseconds per spawn':<34}{before_spawn[1] * 1e6:>14.2f}{after_spawn[1] * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
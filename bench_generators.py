@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Benchmark for the map generators in map_generators.
+
+Times every registered generator (or the ones named on the command line) on
+a few map sizes with fixed seeds, and prints the share of the map that ends
+up as floor next to the timings, so generators can be compared by both
+speed and layout.
+
+Run with: python bench_generators.py [generator ...]
+"""
+# argparse reads the generator names from the command line
+import argparse
+
+# time.perf_counter is a high resolution clock used to time the generators.
+import time
+
+from typing import List, Tuple
+
+import numpy as np  # type: ignore
+
+from entity import Entity
+from map_generators import GENERATORS, MapGenerator
+
+# (map width, map height) for each run.
+SIZES = [(80, 50), (250, 250), (1_000, 1_000)]
+SEEDS = range(5)
+
+
+def bench(generator: MapGenerator, width: int, height: int) -> Tuple[float, float]:
+    """Return the best time of a generator over SEEDS and its average floor fraction."""
+    best = float("inf")
+    floor: List[float] = []
+    for seed in SEEDS:
+        player = Entity(0, 0, "@", (255, 255, 255))
+        start = time.perf_counter()
+        dungeon = generator(width, height, player, rng=seed)
+        best = min(best, time.perf_counter() - start)
+        floor.append(float(np.asarray(dungeon.walkable).mean()))
+    return best, float(np.mean(floor))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the map generators.")
+    parser.add_argument("generators", nargs="*", help=f"generators to run (default: all of {', '.join(GENERATORS)})")
+    args = parser.parse_args()
+    for name in args.generators:
+        if name not in GENERATORS:
+            parser.error(f"unknown generator {name!r}")
+
+    print(f"{'generator':>10}{'map':>12}{'best ms':>10}{'maps/s':>10}{'floor':>8}")
+    for name in args.generators or GENERATORS:
+        for width, height in SIZES:
+            best, floor = bench(GENERATORS[name], width, height)
+            print(f"{name:>10}{f'{width}x{height}':>12}{best * 1000:>10.1f}{1 / best:>10.1f}{floor:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Benchmark suite for procgen.generate_dungeon.
+
+Generates maps over a grid of map sizes and room counts, always from the
+same seeds, and reports maps per second, cells per second and the peak
+memory allocated while generating one map. The results can be written to a
+JSON file, and an earlier JSON file can be passed in to print the speed-up
+of every configuration against it.
+
+Run with: python bench_procgen.py [--json results.json] [--compare old.json]
+"""
+# argparse reads the JSON files to write or compare against and the chunk size to generate with
+import argparse
+
+# json writes and reads the machine-readable results
+import json
+
+# platform describes the machine the benchmark ran on
+import platform
+
+# tracemalloc measures the memory allocated while a map is generated
+import tracemalloc
+
+# time.perf_counter is a high resolution clock used to time the generation.
+import time
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np  # type: ignore
+import tcod
+
+from entity import Entity
+from procgen import generate_dungeon
+
+# The grid of configurations: every map size is run with every room count.
+SIZES = [(80, 50), (250, 250), (1_000, 1_000)]
+ROOM_COUNTS = [30, 300, 3_000]
+ROOM_MIN_SIZE = 6
+ROOM_MAX_SIZE = 10
+# Every configuration generates one map per seed, so runs are comparable.
+SEEDS = range(10)
+
+
+def generate(width: int, height: int, max_rooms: int, seed: int, chunk_size: Optional[int]) -> None:
+    player = Entity(0, 0, "@", (255, 255, 255))
+    generate_dungeon(
+        max_rooms=max_rooms,
+        room_min_size=ROOM_MIN_SIZE,
+        room_max_size=ROOM_MAX_SIZE,
+        map_width=width,
+        map_height=height,
+        player=player,
+        chunk_size=chunk_size,
+        rng=seed,
+    )
+
+
+def bench(width: int, height: int, max_rooms: int, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """Benchmark one configuration and return its results."""
+    # Time every seed first, then measure memory in a separate pass, since tracemalloc slows down allocation.
+    times: List[float] = []
+    for seed in SEEDS:
+        start = time.perf_counter()
+        generate(width, height, max_rooms, seed, chunk_size)
+        times.append(time.perf_counter() - start)
+
+    peak = 0
+    for seed in SEEDS:
+        tracemalloc.start()
+        generate(width, height, max_rooms, seed, chunk_size)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    median = float(np.median(times))
+    return {
+        "width": width,
+        "height": height,
+        "max_rooms": max_rooms,
+        "chunk_size": chunk_size,
+        "seeds": len(SEEDS),
+        "median_ms": median * 1000,
+        "min_ms": min(times) * 1000,
+        "maps_per_second": 1 / median,
+        "cells_per_second": width * height / median,
+        "peak_bytes": peak,
+    }
+
+
+def key(result: Dict[str, Any]) -> tuple:
+    return result["width"], result["height"], result["max_rooms"], result["chunk_size"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark generate_dungeon over a grid of sizes and room counts.")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="a results file from an earlier run to compare against")
+    parser.add_argument("--chunk-size", type=int, help="generate on the chunked backend with this chunk size")
+    args = parser.parse_args()
+
+    baseline: Dict[tuple, Dict[str, Any]] = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {key(result): result for result in json.load(f)["results"]}
+
+    print(f"{'map':>12}{'rooms':>7}{'median ms':>11}{'maps/s':>10}{'Mcells/s':>10}{'peak KiB':>10}{'vs old':>8}")
+    results = []
+    for width, height in SIZES:
+        for max_rooms in ROOM_COUNTS:
+            result = bench(width, height, max_rooms, args.chunk_size)
+            results.append(result)
+            old = baseline.get(key(result))
+            change = f"{old['median_ms'] / result['median_ms']:.2f}x" if old else "-"
+            print(
+                f"{f'{width}x{height}':>12}{max_rooms:>7}{result['median_ms']:>11.2f}{result['maps_per_second']:>10.1f}"
+                f"{result['cells_per_second'] / 1e6:>10.2f}{result['peak_bytes'] / 1024:>10.0f}{change:>8}"
+            )
+
+    if args.json:
+        environment = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "tcod": tcod.__version__,
+            "machine": platform.machine(),
+            "system": platform.system(),
+        }
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Cross-check and benchmark for shadowcast.shadowcast_batch.
+
+Generates a batch of maps, picks a random floor cell of each one as its
+viewer, and computes the FOV of the whole batch with shadowcast_batch and
+with one tcod.map.compute_fov call per map. The results must be equal cell
+for cell, and the time of both is printed for a few batch sizes and radii.
+
+Run with: python bench_shadowcast.py [--generator rooms] [--seed 0]
+"""
+# argparse reads which generator makes the maps and the seed
+import argparse
+
+# time.perf_counter is a high resolution clock used to time the FOV.
+import time
+
+from typing import Tuple
+
+import numpy as np  # type: ignore
+import tcod
+
+from entity import Entity
+from map_generators import GENERATORS
+from shadowcast import shadowcast_batch
+
+MAP_WIDTH = 80
+MAP_HEIGHT = 50
+BATCH_SIZES = [1, 16, 64, 256, 1_024]
+RADII = [0, 8]
+
+
+def make_batch(generator: str, size: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return a (size, width, height) stack of transparency masks and one viewer on a floor cell of each."""
+    rng = np.random.default_rng(seed)
+    masks = np.zeros((size, MAP_WIDTH, MAP_HEIGHT), dtype=bool)
+    origins = np.zeros((size, 2), dtype=np.intp)
+    for i in range(size):
+        player = Entity(0, 0, "@", (255, 255, 255))
+        dungeon = GENERATORS[generator](MAP_WIDTH, MAP_HEIGHT, player, rng=rng)
+        masks[i] = dungeon.transparent
+        floor = np.argwhere(masks[i])
+        origins[i] = floor[rng.integers(len(floor))]
+    return masks, origins
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check shadowcast_batch against tcod and time both.")
+    parser.add_argument("--generator", default="rooms", help=f"map generator to use (one of {', '.join(GENERATORS)})")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.generator not in GENERATORS:
+        parser.error(f"unknown generator {args.generator!r}")
+
+    masks, origins = make_batch(args.generator, max(BATCH_SIZES), args.seed)
+    print(f"{'batch':>7}{'radius':>8}{'numpy ms':>10}{'tcod ms':>10}{'speed-up':>10}")
+    for size in BATCH_SIZES:
+        for radius in RADII:
+            start = time.perf_counter()
+            batch = shadowcast_batch(masks[:size], origins[:size], radius)
+            numpy_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected = [
+                tcod.map.compute_fov(masks[i], tuple(origins[i]), radius, True, tcod.FOV_SYMMETRIC_SHADOWCAST)
+                for i in range(size)
+            ]
+            tcod_time = time.perf_counter() - start
+
+            for i in range(size):
+                if not np.array_equal(batch[i], expected[i]):
+                    raise SystemExit(f"mismatch for viewer {tuple(origins[i])} of map {i} at radius {radius}")
+            print(
+                f"{size:>7}{radius:>8}{numpy_time * 1000:>10.2f}{tcod_time * 1000:>10.2f}"
+                f"{tcod_time / numpy_time:>9.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# importing Tuple from the typing module
+from typing import Tuple
+
+
+class Camera:
+    """The rectangle of the map which is shown on the console.
+
+    `x` and `y` are the map coordinates of the top left corner of the view.
+    """
+
+    # The width and height are the size of the view in cells, which is normally the size of the console.
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.x = 0
+        self.y = 0
+
+    # Centers the view on (x, y), the player's position for example. The view is kept inside the map, so near the edges of the map the target is no longer in the center. If the map is smaller than the view, the view stays at the top left corner of the map.
+    def follow(self, x: int, y: int, map_width: int, map_height: int) -> None:
+        """Move the view so that it is centered on (x, y) as far as the map allows."""
+        self.x = max(0, min(x - self.width // 2, map_width - self.width))
+        self.y = max(0, min(y - self.height // 2, map_height - self.height))
+
+    @property
+    def position(self) -> Tuple[int, int]:
+        """The map coordinates of the top left corner of the view."""
+        return self.x, self.y
+
+    def view(self, map_width: int, map_height: int) -> Tuple[int, int, int, int]:
+        """Return the visible part of the map as (x0, y0, x1, y1), with x1 and y1 exclusive."""
+        return self.x, self.y, min(self.x + self.width, map_width), min(self.y + self.height, map_height)
+
+    def to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        """Convert map coordinates (or arrays of them) to console coordinates."""
+        return x - self.x, y - self.y
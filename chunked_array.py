@@ -0,0 +1,288 @@
+# this line allows for the future resolution of type hints, so the ChunkedArray class can refer to itself in its own type hints.
+from __future__ import annotations
+
+# importing Any, Dict, Iterator, Tuple and Union from the typing module which provides support for type hints and annotations
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+# Imports the numpy library and assigns it to the variable np. The 'type: ignore' comment tells type checkers to ignore any type errors related to the numpy import.
+import numpy as np  # type: ignore
+
+# The default width and height (in cells) of a single chunk. 64x64 cells keeps each chunk small enough that a mostly empty world costs almost nothing, while still being big enough that digging a room only touches one or two chunks.
+DEFAULT_CHUNK_SIZE = 64
+
+
+class ChunkedArray:
+    """A 2D array stored as square chunks which are only allocated when first written.
+
+    Cells in chunks that were never written read back as `fill_value`.  Indexing
+    follows the NumPy rules that the rest of the game relies on: integers, slices,
+    coordinate arrays, boolean masks and (for structured dtypes) field names.
+    """
+
+    # The number of dimensions of the array. This is always 2 since the array represents a map.
+    ndim = 2
+
+    # The __init__ method takes the full shape of the array, the dtype of each cell, the value that unwritten cells read as and the size of each chunk. No chunks are allocated here, chunks are only created when something different from 'fill_value' is written into them.
+    def __init__(
+        self,
+        shape: Tuple[int, int],
+        dtype: Any,
+        fill_value: Any,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}.")
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.dtype = np.dtype(dtype)
+        # 'fill_value' is stored as a zero dimensional array so it can be compared and broadcast the same way for plain and structured dtypes.
+        self.fill_value = np.asarray(fill_value, dtype=self.dtype)
+        self.chunk_size = chunk_size
+        # The number of chunks along the y axis, this is used to give every chunk a single integer key when grouping coordinate arrays by chunk.
+        self._chunks_high = -(-self.shape[1] // chunk_size)
+        # Maps the (chunk_x, chunk_y) coordinates of a chunk to its array. A missing key means the chunk has never been written and is entirely 'fill_value'.
+        self.chunks: Dict[Tuple[int, int], np.ndarray] = {}
+
+    @property
+    def size(self) -> int:
+        """The total number of cells, allocated or not."""
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes used by the chunks which have been allocated so far."""
+        return sum(chunk.nbytes for chunk in self.chunks.values())
+
+    # The __array__ method is what numpy calls when this object is passed to np.asarray or assigned into a numpy array. It builds a normal dense array of the whole map, so it should only be used on maps which would fit in memory anyway. The 'copy' argument is passed by numpy 2 and can be ignored, since the dense array is always a new one.
+    def __array__(self, dtype: Any = None, copy: Optional[bool] = None) -> np.ndarray:
+        dense = self._read_rect(0, self.shape[0], 0, self.shape[1])
+        if dtype is not None:
+            return dense.astype(dtype)
+        return dense
+
+    # Builds a new ChunkedArray by looking every cell up in a table, like 'walkable_lut[ids]' does for a numpy array. Only the allocated chunks are looked up, unallocated chunks stay unallocated and read as the looked up 'fill_value'.
+    def lookup(self, lut: np.ndarray) -> ChunkedArray:
+        """Return `lut[self]` as a new ChunkedArray with the same chunk layout."""
+        result = ChunkedArray(self.shape, lut.dtype, lut[self.fill_value], self.chunk_size)
+        for coords, chunk in self.chunks.items():
+            result.chunks[coords] = np.asfortranarray(lut[chunk])
+        return result
+
+    def __getitem__(self, key: Any) -> Any:
+        # A string key selects a field of a structured dtype, like 'tiles["walkable"]'. A view object is returned so that 'tiles["walkable"][x, y]' only reads the one cell instead of the whole map.
+        if isinstance(key, str):
+            return ChunkedField(self, key)
+
+        # Fast path for reading a single cell, which is by far the most common read.
+        if type(key) is tuple and len(key) == 2 and _is_int(key[0]) and _is_int(key[1]):
+            x, y = _check_index(int(key[0]), self.shape[0]), _check_index(int(key[1]), self.shape[1])
+            chunk = self.chunks.get((x // self.chunk_size, y // self.chunk_size))
+            if chunk is None:
+                return self.fill_value[()]
+            return chunk[x % self.chunk_size, y % self.chunk_size]
+
+        parsed = parse_index(key, self.shape)
+        if parsed[0] == "rect":
+            _, (x0, x1, y0, y1), squeeze = parsed
+            return self._read_rect(x0, x1, y0, y1)[squeeze]
+        _, xs, ys = parsed
+        return self._read_points(xs, ys)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        if isinstance(key, str):
+            ChunkedField(self, key)[...] = value
+            return
+
+        parsed = parse_index(key, self.shape)
+        if parsed[0] == "rect":
+            _, (x0, x1, y0, y1), squeeze = parsed
+            self._write_rect(x0, x1, y0, y1, value, squeeze)
+        else:
+            _, xs, ys = parsed
+            self._write_points(xs, ys, value)
+
+    # Yields every allocated chunk overlapping the rectangle along with the overlapping region in both map and chunk coordinates. When the rectangle covers more chunk slots than there are allocated chunks (a big read on a mostly empty map) the allocated chunks are filtered instead of probing every slot.
+    def _overlapping_chunks(
+        self, x0: int, x1: int, y0: int, y1: int, allocate: bool = False
+    ) -> Iterator[Tuple[Tuple[int, int], Tuple[slice, slice], Tuple[slice, slice]]]:
+        cs = self.chunk_size
+        cx0, cx1 = x0 // cs, -(-x1 // cs)
+        cy0, cy1 = y0 // cs, -(-y1 // cs)
+        if allocate or (cx1 - cx0) * (cy1 - cy0) <= len(self.chunks):
+            coords: Any = ((cx, cy) for cx in range(cx0, cx1) for cy in range(cy0, cy1))
+        else:
+            coords = [c for c in self.chunks if cx0 <= c[0] < cx1 and cy0 <= c[1] < cy1]
+        for cx, cy in coords:
+            lx0, lx1 = max(x0, cx * cs), min(x1, (cx + 1) * cs)
+            ly0, ly1 = max(y0, cy * cs), min(y1, (cy + 1) * cs)
+            yield (
+                (cx, cy),
+                (slice(lx0 - x0, lx1 - x0), slice(ly0 - y0, ly1 - y0)),
+                (slice(lx0 - cx * cs, lx1 - cx * cs), slice(ly0 - cy * cs, ly1 - cy * cs)),
+            )
+
+    def _new_chunk(self) -> np.ndarray:
+        return np.full((self.chunk_size, self.chunk_size), self.fill_value, dtype=self.dtype, order="F")
+
+    def _is_fill(self, value: np.ndarray) -> bool:
+        return value.tobytes() == self.fill_value.tobytes()
+
+    def _read_rect(self, x0: int, x1: int, y0: int, y1: int) -> np.ndarray:
+        out = np.full((x1 - x0, y1 - y0), self.fill_value, dtype=self.dtype, order="F")
+        if x1 <= x0 or y1 <= y0:
+            return out
+        for coords, out_index, chunk_index in self._overlapping_chunks(x0, x1, y0, y1):
+            chunk = self.chunks.get(coords)
+            if chunk is not None:
+                out[out_index] = chunk[chunk_index]
+        return out
+
+    def _write_rect(self, x0: int, x1: int, y0: int, y1: int, value: Any, squeeze: Tuple[Any, ...]) -> None:
+        if x1 <= x0 or y1 <= y0:
+            return
+        value = np.asarray(value, dtype=self.dtype)
+        # A single value (like 'tile_types.floor') is written as is. Otherwise the value is shaped like the selection the caller asked for, which has the integer axes removed, so those axes are added back before broadcasting to the rectangle.
+        uniform = value.ndim == 0
+        if not uniform:
+            target = np.empty((x1 - x0, y1 - y0), dtype=bool)[squeeze].shape
+            value = np.broadcast_to(value, target)
+            value = value.reshape((x1 - x0, y1 - y0))
+        # Writing 'fill_value' into a chunk that was never allocated changes nothing, so no chunk is created for it.
+        skip_missing = uniform and self._is_fill(value)
+        for coords, out_index, chunk_index in self._overlapping_chunks(x0, x1, y0, y1, allocate=not skip_missing):
+            chunk = self.chunks.get(coords)
+            if chunk is None:
+                if skip_missing:
+                    continue
+                chunk = self.chunks[coords] = self._new_chunk()
+            chunk[chunk_index] = value if uniform else value[out_index]
+
+    # Groups broadcast coordinate arrays by the chunk each coordinate falls in. Returns the chunk coordinates along with the flat positions (into the coordinate arrays) that belong to that chunk.
+    def _group_points(self, xs: np.ndarray, ys: np.ndarray) -> Iterator[Tuple[Tuple[int, int], np.ndarray]]:
+        cs = self.chunk_size
+        keys = (xs // cs) * self._chunks_high + (ys // cs)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        unique_keys, starts = np.unique(sorted_keys, return_index=True)
+        ends = np.append(starts[1:], sorted_keys.size)
+        for key, start, end in zip(unique_keys.tolist(), starts.tolist(), ends.tolist()):
+            yield divmod(key, self._chunks_high), order[start:end]
+
+    def _read_points(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        out = np.full(xs.shape, self.fill_value, dtype=self.dtype)
+        flat_out, flat_x, flat_y = out.reshape(-1), xs.reshape(-1), ys.reshape(-1)
+        cs = self.chunk_size
+        for coords, index in self._group_points(flat_x, flat_y):
+            chunk = self.chunks.get(coords)
+            if chunk is not None:
+                flat_out[index] = chunk[flat_x[index] % cs, flat_y[index] % cs]
+        return out
+
+    def _write_points(self, xs: np.ndarray, ys: np.ndarray, value: Any) -> None:
+        value = np.asarray(value, dtype=self.dtype)
+        uniform = value.ndim == 0
+        skip_missing = uniform and self._is_fill(value)
+        if not uniform:
+            value = np.broadcast_to(value, xs.shape).reshape(-1)
+        flat_x, flat_y = xs.reshape(-1), ys.reshape(-1)
+        cs = self.chunk_size
+        for coords, index in self._group_points(flat_x, flat_y):
+            chunk = self.chunks.get(coords)
+            if chunk is None:
+                if skip_missing:
+                    continue
+                chunk = self.chunks[coords] = self._new_chunk()
+            chunk[flat_x[index] % cs, flat_y[index] % cs] = value if uniform else value[index]
+
+
+class ChunkedField:
+    """A view of a single field of a structured ChunkedArray, like `tiles["walkable"]`."""
+
+    def __init__(self, parent: ChunkedArray, name: str):
+        self.parent = parent
+        self.name = name
+        self.dtype = parent.dtype[name]
+        self.shape = parent.shape
+
+    def __array__(self, dtype: Any = None, copy: Optional[bool] = None) -> np.ndarray:
+        dense = np.asarray(self.parent)[self.name]
+        if dtype is not None:
+            return dense.astype(dtype)
+        return dense
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.parent[key][self.name]
+
+    # Writing a single field reads the selected cells, replaces the field and writes the cells back, which leaves the other fields untouched.
+    def __setitem__(self, key: Any, value: Any) -> None:
+        cells = np.array(self.parent[key], dtype=self.parent.dtype)
+        cells[self.name] = value
+        self.parent[key] = cells
+
+
+# Converts any supported index into either a rectangle ('rect', with the (x0, x1, y0, y1) bounds and how to squeeze away integer axes) or a pair of broadcast coordinate arrays ('points'). ChunkedArray handles rectangles chunk by chunk and groups coordinate arrays by the chunk each coordinate falls in. GameMap also uses this to find out which cells a write touched.
+def parse_index(key: Any, shape: Tuple[int, int]) -> Tuple[Any, ...]:
+    """Normalize a 2D index into a rectangle or a pair of coordinate arrays."""
+    if key is Ellipsis:
+        key = (slice(None), slice(None))
+    elif isinstance(key, np.ndarray) and key.dtype == bool:
+        if key.shape != tuple(shape):
+            raise IndexError(f"Boolean index shape {key.shape} does not match {tuple(shape)}.")
+        xs, ys = np.nonzero(key)
+        return "points", xs, ys
+    elif not isinstance(key, tuple):
+        key = (key, slice(None))
+
+    if len(key) != 2:
+        raise IndexError(f"Expected an index for 2 dimensions, got {len(key)}.")
+
+    basic = all(_is_int(k) or (isinstance(k, slice) and k.step in (None, 1)) for k in key)
+    if basic:
+        bounds = []
+        squeeze = []
+        for axis, k in enumerate(key):
+            if isinstance(k, slice):
+                start, stop, _ = k.indices(shape[axis])
+                bounds += [start, max(start, stop)]
+                squeeze.append(slice(None))
+            else:
+                i = _check_index(int(k), shape[axis])
+                bounds += [i, i + 1]
+                squeeze.append(0)
+        return "rect", tuple(bounds), tuple(squeeze)
+
+    # Anything else is turned into coordinate arrays, following numpy's rule that a slice next to an index array produces an extra trailing (or leading) dimension.
+    kx, ky = key
+    xs = _axis_to_array(kx, shape[0])
+    ys = _axis_to_array(ky, shape[1])
+    if isinstance(kx, slice):
+        xs = xs.reshape(xs.shape + (1,) * max(ys.ndim, 1 if isinstance(ky, slice) else 0))
+    elif isinstance(ky, slice):
+        xs = xs.reshape(xs.shape + (1,))
+    xs, ys = np.broadcast_arrays(xs, ys)
+    return "points", xs, ys
+
+
+def _axis_to_array(k: Any, size: int) -> np.ndarray:
+    if isinstance(k, slice):
+        return np.arange(*k.indices(size))
+    array = np.asarray(k)
+    if array.dtype == bool:
+        raise IndexError("Boolean indexes are only supported for the whole array.")
+    array = array.astype(np.intp, copy=True)
+    array[array < 0] += size
+    if array.size and (array.min() < 0 or array.max() >= size):
+        raise IndexError(f"Index out of bounds for an axis with size {size}.")
+    return array
+
+
+def _check_index(i: int, size: int) -> int:
+    if i < 0:
+        i += size
+    if not 0 <= i < size:
+        raise IndexError(f"Index {i} is out of bounds for an axis with size {size}.")
+    return i
+
+
+# Returns True for python and numpy integers, but not for booleans which numpy treats as masks.
+def _is_int(value: Union[int, Any]) -> bool:
+    return isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_))
@@ -0,0 +1,158 @@
+# Connected component labelling of the walkable cells of a map, so the game can tell which floor cells can be reached from which (for example, whether every part of a generated map can be reached from the player's start). Two walkable cells are connected when they share an edge. There is no per-cell Python: each column of the map is split into runs of walkable cells, the runs which touch across neighbouring columns are joined as a graph, and the components of that graph are found with a few whole-array passes. Chunked maps are labelled the same way a batch of chunks at a time, and the labels which touch across the edges between chunks are joined afterwards, so the labels of a huge world never need an array the size of the world.
+
+from __future__ import annotations
+
+from typing import Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+import tile_types
+
+# Chunked maps are labelled chunk by chunk, and the labels are kept in a ChunkedArray with the same chunks as the map.
+from chunked_array import ChunkedArray
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+# The region ID given to cells that can't be walked on.
+NO_REGION = -1
+
+
+def label_regions(walkable: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Label the connected regions of a boolean walkable mask.
+
+    Returns an int32 array the shape of the mask holding the region ID of
+    every walkable cell (NO_REGION elsewhere), and an array with the number
+    of cells in each region. Region IDs count up from 0 in the order the
+    regions are first met, scanning x then y.
+    """
+    walkable = np.ascontiguousarray(walkable, dtype=bool)
+    regions = np.full(walkable.shape, NO_REGION, dtype=np.int32)
+    if not walkable.any():
+        return regions, np.zeros(0, dtype=np.int64)
+
+    # A run starts at every walkable cell whose neighbour above it (y - 1) isn't walkable. Numbering the starts in memory order gives every cell of a run the same run ID, since a column's first walkable cell always starts a new run.
+    starts = walkable.copy()
+    starts[:, 1:] &= ~walkable[:, :-1]
+    run_ids = np.cumsum(starts, dtype=np.int32).reshape(walkable.shape) - 1
+    run_count = int(np.count_nonzero(starts))
+
+    # Every pair of side by side walkable cells joins the runs they belong to. Runs touch over several cells, so the duplicate pairs are dropped (each pair is packed into one integer so np.unique only has to sort a flat array).
+    touching = walkable[:-1] & walkable[1:]
+    edges = np.unique(run_ids[:-1][touching].astype(np.int64) * run_count + run_ids[1:][touching])
+    a, b = np.divmod(edges, run_count)
+
+    # Every cell gets the component number of its run.
+    run_regions = _components(run_count, a, b)
+    regions[walkable] = run_regions[run_ids[walkable]]
+    sizes = np.bincount(regions[walkable])
+    return regions, sizes
+
+
+# Finds the connected components of a graph of 'count' nodes joined by the edges a[i] - b[i], and returns the component number of every node. Components are numbered 0, 1, 2, ... in the order of their lowest node.
+def _components(count: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Each node points at a parent node with a lower ID, and the node at the top of the chain (its root) names the component. Every pass hooks the root of the higher end of each edge onto the lower root, then shortens every chain until each node points straight at its root. The passes stop once both ends of every edge share a root.
+    parent = np.arange(count, dtype=np.int64)
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        different = root_a != root_b
+        if not different.any():
+            break
+        np.minimum.at(parent, np.maximum(root_a, root_b)[different], np.minimum(root_a, root_b)[different])
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    # The roots (the nodes which are their own parent) are renumbered to 0, 1, 2, ...
+    is_root = parent == np.arange(count)
+    return (np.cumsum(is_root, dtype=np.int32) - 1)[parent]
+
+
+# How many chunks label_chunked_regions labels with one call to label_regions. Bigger batches have less overhead per chunk but need more memory while they are labelled.
+CHUNK_BATCH_SIZE = 1024
+
+
+def label_chunked_regions(walkable: ChunkedArray) -> Tuple[ChunkedArray, np.ndarray]:
+    """Label the connected regions of a chunked walkable mask.
+
+    Returns the same as label_regions, but with the region IDs in a
+    ChunkedArray with the same chunks as `walkable`, so the labels of a huge
+    world only take memory where the world has been dug. Region IDs count up
+    from 0 in the order of the chunks, rather than scanning the whole map.
+    """
+    if walkable.fill_value:
+        raise ValueError("Chunked maps whose unallocated chunks can be walked on can't be labelled chunk by chunk.")
+    size = walkable.chunk_size
+    regions = ChunkedArray(walkable.shape, np.int32, NO_REGION, size)
+    coords = sorted(walkable.chunks)
+    if not coords:
+        return regions, np.zeros(0, dtype=np.int64)
+
+    # Every chunk is labelled on its own first. A batch of chunks is stacked along x with a column of wall after each one, so one call to label_regions labels all of them without joining any two. The labels of every chunk are shifted so they don't clash with those of earlier batches, and the four edges of every chunk are kept for joining the chunks afterwards.
+    batches = []
+    edges = np.empty((len(coords), 4, size), dtype=np.int32)
+    chunk_sizes = []
+    count = 0
+    for first in range(0, len(coords), CHUNK_BATCH_SIZE):
+        batch = coords[first:first + CHUNK_BATCH_SIZE]
+        stacked = np.zeros((len(batch), size + 1, size), dtype=bool)
+        for i, chunk in enumerate(batch):
+            stacked[i, :size] = walkable.chunks[chunk]
+        labels, sizes = label_regions(stacked.reshape(-1, size))
+        labels = labels.reshape(len(batch), size + 1, size)[:, :size]
+        labels[labels != NO_REGION] += count
+        count += len(sizes)
+        chunk_sizes.append(sizes)
+        edges[first:first + len(batch)] = np.stack(
+            [labels[:, 0, :], labels[:, -1, :], labels[:, :, 0], labels[:, :, -1]], axis=1
+        )
+        batches.append((batch, labels))
+
+    # Then the labels which touch across the edge between two neighbouring chunks are joined. Chunks are found by a single number per chunk (they are sorted, so the numbers are too), and the neighbour of chunk i to the right (x + 1) or below (y + 1) is looked up with a binary search.
+    chunks_high = -(-walkable.shape[1] // size)
+    codes = np.array([cx * chunks_high + cy for cx, cy in coords])
+    a_parts, b_parts = [], []
+    for step, near_edge, far_edge, in_map in (
+        (chunks_high, 1, 0, np.ones(len(codes), dtype=bool)),
+        # y + 1 past the bottom of the map would be the top of the next column of chunks.
+        (1, 3, 2, codes % chunks_high != chunks_high - 1),
+    ):
+        neighbour = np.minimum(np.searchsorted(codes, codes + step), len(codes) - 1)
+        found = (codes[neighbour] == codes + step) & in_map
+        near, far = edges[found, near_edge], edges[neighbour[found], far_edge]
+        touching = (near != NO_REGION) & (far != NO_REGION)
+        a_parts.append(near[touching])
+        b_parts.append(far[touching])
+    global_ids = _components(count, np.concatenate(a_parts), np.concatenate(b_parts))
+
+    # Every chunk's labels are swapped for the joined ones in place (NO_REGION, which is -1, picks the extra entry on the end of the table).
+    table = np.append(global_ids, NO_REGION).astype(np.int32)
+    for batch, labels in batches:
+        np.take(table, labels, out=labels)
+        for i, chunk in enumerate(batch):
+            regions.chunks[chunk] = labels[i]
+    sizes = np.bincount(global_ids, weights=np.concatenate(chunk_sizes)).astype(np.int64)
+    return regions, sizes
+
+
+# Fills every region of a GameMap but the largest one back in with walls, for maps which are already built (a generator working on its own wall array, like the cellular automata caves, does the same with label_regions before it writes any tiles, which saves labelling the map twice).
+def keep_largest_region(game_map: GameMap) -> None:
+    """Turn every walkable region except the largest one into wall."""
+    sizes = game_map.region_sizes
+    if len(sizes) < 2:
+        return
+    regions = game_map.regions
+    largest = int(np.argmax(sizes))
+    if isinstance(regions, ChunkedArray):
+        # Only the allocated chunks can hold regions, so they are gone through one by one instead of building a mask of the whole world.
+        xs, ys = [], []
+        for (cx, cy), chunk in regions.chunks.items():
+            i, j = np.nonzero((chunk != NO_REGION) & (chunk != largest))
+            xs.append(i + cx * regions.chunk_size)
+            ys.append(j + cy * regions.chunk_size)
+        game_map.tiles[np.concatenate(xs), np.concatenate(ys)] = tile_types.wall
+        return
+    cut_off = (regions != NO_REGION) & (regions != largest)
+    game_map.tiles[cut_off] = tile_types.wall
@@ -1,5 +1,8 @@
 # importing Set, Iterable, and Any from the typing module which proveds support for type hints and annotations
-from typing import Set, Iterable, Any
+from typing import Set, Iterable, Any, List, Optional, Tuple
+
+# importing numpy, which is used to pass the cells to redraw to the game map as arrays
+import numpy as np  # type: ignore
 
 # importing Context and Console from the tcod module
 from tcod.context import Context
@@ -11,6 +14,21 @@ from actions import EscapeAction, MovementAction
 # importing the Entity class from the entity module
 from entity import Entity
 
+# importing the Camera class from the camera module
+from camera import Camera
+
+# importing the FrameTimer class from the frame_timer module
+from frame_timer import FrameTimer
+
+# importing the EntityStore class from the entity_store module
+from entity_store import EntityStore
+
+# importing the LevelPrefetcher class from the level_prefetch module
+from level_prefetch import LevelPrefetcher
+
+# importing the SpatialIndex class from the spatial_index module
+from spatial_index import SpatialIndex
+
 # importing the GameMap class from the game_map module
 from game_map import GameMap
 
@@ -19,12 +37,72 @@ from input_handlers import EventHandler
 
 # Defining the Engine class and defining the __init__ method which is called when an instance of the class is created. The __init__ method takes in the following parameters: entities, event_handler, game_map, and player. The parameters are then assigned to the class instance variables of the same name (self.).
 class Engine:
-    def __init__(self, entities: Set[Entity], event_handler: EventHandler, game_map: GameMap, player: Entity):
+    def __init__(
+        self,
+        entities: Set[Entity],
+        event_handler: EventHandler,
+        game_map: GameMap,
+        player: Entity,
+        entity_store: Optional[EntityStore] = None,
+        camera: Optional[Camera] = None,
+        timer: Optional[FrameTimer] = None,
+        prefetcher: Optional[LevelPrefetcher] = None,
+    ):
         self.entities = entities
         self.event_handler = event_handler
         self.game_map = game_map
         self.player = player
 
+        # The spatial index answers questions like 'what is at (x, y)' or 'who is within radius r' without looping over every entity. The entities keep it up to date themselves when they move, and add_entity and remove_entity keep it in sync with self.entities.
+        self.spatial_index = SpatialIndex()
+        for entity in self.entities:
+            self.spatial_index.add(entity)
+
+        # The cells entities were drawn on in the last frame, along with the game map they were drawn over. The console is no longer cleared between frames, so these cells have to be redrawn from the map before the entities are drawn at their new positions.
+        self._entity_cells: List[Tuple[int, int]] = []
+        self._store_cells: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._rendered_map: Any = None
+        self._rendered_view: Optional[Tuple[int, int]] = None
+
+        # An optional EntityStore for large numbers of simple entities (like swarms of monsters). They are kept in numpy arrays and rendered with a single array write, instead of one console.print call per entity.
+        self.entity_store = entity_store
+
+        # An optional Camera. With a camera the map can be bigger than the console: the camera follows the player and only the part of the map (and the entities) inside its view are drawn. Without one, the whole map is drawn at the top left of the console like before.
+        self.camera = camera
+
+        # An optional FrameTimer which records how long each phase of every frame takes. When it is None (the default) timing is off and each phase only costs an 'is None' check.
+        self.timer = timer
+
+        # An optional LevelPrefetcher. The next floor starts generating in the background as soon as this floor is loaded, so taking the stairs (see descend) doesn't have to wait for the dungeon generator.
+        self.prefetcher = prefetcher
+        if self.prefetcher is not None:
+            self.prefetcher.prefetch()
+
+    # Adds an entity to the game, both to the set of entities that gets rendered and to the spatial index.
+    def add_entity(self, entity: Entity) -> None:
+        self.entities.add(entity)
+        self.spatial_index.add(entity)
+
+    # Removes an entity from the game and from the spatial index.
+    def remove_entity(self, entity: Entity) -> None:
+        self.entities.discard(entity)
+        if entity in self.spatial_index:
+            self.spatial_index.remove(entity)
+
+    # Moves the player down to the next floor. The new floor comes from the prefetcher, so it is normally already generated and this is just a swap. Everything that belonged to the old floor (every entity except the player, and the entity store) is removed, and generation of the floor after that is started straight away.
+    def descend(self) -> None:
+        if self.prefetcher is None:
+            return
+        game_map, start = self.prefetcher.take()
+        for entity in list(self.entities):
+            if entity is not self.player:
+                self.remove_entity(entity)
+        if self.entity_store is not None:
+            self.entity_store.clear()
+        self.game_map = game_map
+        self.player.place(*start)
+        self.prefetcher.prefetch()
+
     # This function is called every frame and handles the events that are passed in from the main. The parameter 'events' is declared with a type hint specifying the expected type of the 'events' parameter it's indicated that it should be an iterable of any type (such as a list or a tuple) containing elements of any type ('Any', which is an official data type in python that is part of the 'typing' module which provides support for type hints and annotations. The 'Any' type essentially disables static type checking for the specific value and allows it to be compatible with any other type). 
     def handle_events(self, events: Iterable[Any]) -> None:
 
@@ -32,6 +110,10 @@ class Engine:
 
         # Here event is a variable that is assigned to each element in the events iterable. The iterable is a list of events that are passed in from the main.py file. The events are passed in from the main.py file by the tcod.event.wait() function which is called in the main.py file. The tcod.event.wait() function returns a list of events that are passed in to the handle_events function. The handle_events function then iterates over the list of events and passes each event to the event_handler.dispatch function. The event_handler.dispatch function then returns an action which is then assigned to the variable 'action'. The function then checks if the action is None and if it is it continues to the next event. If the action is not None it calls the perform function of the action and passes in the engine and player as parameters. The perform function is defined in the actions.py file.
 
+        timer = self.timer
+        if timer is not None:
+            timer.restart()
+
         # event is a variable used as a placeholder to iterate through the events iterable
         for event in events:
 
@@ -47,19 +129,66 @@ class Engine:
             # Here the perform function is being called on the action variable and the engine and player are being passed in as parameters. The perform function is defined in the actions.py file.
             action.perform(self, self.player)
 
-    # This function is called every frame and renders the game map and entities to the console. The 'console' parameter is declared with a type hint specifying the expected type of the 'console' parameter it's indicated that it should be an instance of the 'Console' class. The 'context' parameter is declared with a type hint specifying the expected type of the 'context' parameter it's indicated that it should be an instance of the 'Context' class. The 'Console' class is defined in the tcod module and the 'Context' class is defined in the tcod.context module.
-    def render(self, console: Console, context: Context) -> None:
+        if timer is not None:
+            timer.lap("handle_events")
+
+    # This function is called every frame and renders the game map and entities to the console. The 'console' parameter is declared with a type hint specifying the expected type of the 'console' parameter it's indicated that it should be an instance of the 'Console' class. The 'context' parameter is declared with a type hint specifying the expected type of the 'context' parameter it's indicated that it should be an instance of the 'Context' class. The 'Console' class is defined in the tcod module and the 'Context' class is defined in the tcod.context module. The context is Optional: in headless mode (see headless.py) there is no window, so the console is an offscreen Console which is drawn to but never presented.
+    def render(self, console: Console, context: Optional[Context] = None) -> None:
         
-        # The render function calls the render function of the game_map object and passes in the console as an argument. This allows the game map to render itself onto the console, displaying the current state of the map. The render function of the game_map is defined in the game_map.py file.
-        self.game_map.render(console)
+        timer = self.timer
+        if timer is not None:
+            timer.begin_frame()
+
+        # The camera is moved to keep the player in view before anything is drawn.
+        view: Optional[Tuple[int, int]] = None
+        if self.camera is not None:
+            self.camera.follow(self.player.x, self.player.y, self.game_map.width, self.game_map.height)
+            view = self.camera.position
+
+        # If the game map was swapped for a different one, or the camera moved, since the last frame, everything on the console is out of date. The map has to be drawn in full and the old entity cells don't need erasing.
+        if self._rendered_map is not self.game_map or self._rendered_view != view:
+            self.game_map.mark_all_dirty()
+            self._entity_cells = []
+            self._store_cells = None
+            self._rendered_map = self.game_map
+            self._rendered_view = view
+
+        # The render function calls the render function of the game_map object and passes in the console as an argument. This allows the game map to render itself onto the console. The game map only redraws the regions that changed since the last frame (or everything on the first frame). The render function of the game_map is defined in the game_map.py file.
+        self.game_map.render(console, self.camera)
+        if timer is not None:
+            timer.lap("map_render")
+
+        # The entities drawn in the last frame are still on the console, so the map cells under them are redrawn first. This erases entities that moved away, and the entities that didn't move are simply drawn again below.
+        if self._entity_cells:
+            xs, ys = np.array(self._entity_cells).T
+            self.game_map.render_cells(console, xs, ys, self.camera)
+        if self._store_cells is not None:
+            self.game_map.render_cells(console, *self._store_cells, camera=self.camera)
+
+        # The entities in the entity store are drawn first, so the regular entities (like the player) are drawn on top of them.
+        if self.entity_store is not None:
+            self.entity_store.render(console, self.camera)
+            self._store_cells = self.entity_store.visible_cells(console, self.camera)
+
+        # With a camera only the entities inside its view are drawn, which the spatial index finds without looking at every entity on the map. The entities are drawn at their position relative to the camera.
+        if self.camera is not None:
+            x0, y0, x1, y1 = self.camera.view(self.game_map.width, self.game_map.height)
+            visible_entities: Iterable[Entity] = self.spatial_index.in_rect(x0, y0, x1, y1)
+        else:
+            visible_entities = self.entities
 
         # The render function then iterates over the entities and calls the console.print function for each entity. The console.print function is defined in the tcod module. The console.print function takes in the x and y coordinates of the entity, the character to be printed, and the color of the character. The x and y coordinates are accessed from the entity object using the dot operator. The character and color are accessed from the entity object using the dot operator and the 'char' and 'color' attributes of the entity object. The 'char' and 'color' attributes of the entity object are defined in the entity.py file. The 'fg=entity.color' statement is a part of the console.print function it accepts an optional foreground color, here we give it the value of the entity.color attribute. The entity.color attribute is defined in the entity.py file.
-        for entity in self.entities:
-            console.print(entity.x, entity.y, entity.char, fg=entity.color)
-
+        self._entity_cells = []
+        for entity in visible_entities:
+            x, y = self.camera.to_screen(entity.x, entity.y) if self.camera is not None else (entity.x, entity.y)
+            console.print(x, y, entity.char, fg=entity.color)
+            # Remember where the entities were drawn so they can be erased next frame.
+            self._entity_cells.append((entity.x, entity.y))
+        if timer is not None:
+            timer.lap("entity_render")
 
         # context.preset is a function that is defined in the tcod.context module. It takes in a console as an argument and then updates the console. The context.preset function is called here to update the console with the entities and game map that were rendered to the console.
-        context.present(console)
-
-        # The console.clear function is defined in the tcod module. It clears the console of all characters and colors. The console.clear function is called here to clear the console of all characters and colors. Since it is called every frame it clears the console of all characters and colors every frame and then the entities and game map are rendered to the console again by the render function and the context.preset function is called again to update the console with the entities and game map that were rendered to the console.
-        console.clear()
\ No newline at end of file
+        if context is not None:
+            context.present(console)
+        if timer is not None:
+            timer.lap("present")
\ No newline at end of file
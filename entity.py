@@ -1,5 +1,12 @@
-# importing Tuple from the typing module
-from typing import Tuple
+# this line allows for the future resolution of type hints, so the SpatialIndex type hint below doesn't need the spatial_index module to be imported at runtime.
+from __future__ import annotations
+
+# importing List, Optional, Tuple and TYPE_CHECKING from the typing module
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+# The SpatialIndex class is only needed for type hints, so it is only imported while type checking.
+if TYPE_CHECKING:
+    from spatial_index import SpatialIndex
 
 
 class Entity:
@@ -7,15 +14,59 @@ class Entity:
     A generic object to represent players, enemies, items, etc.
     """
 
+    # __slots__ gives every Entity a fixed set of attributes stored directly in the object, instead of a per-instance __dict__. This makes each entity a lot smaller, which adds up once there are thousands of monsters. It also means an Entity can't be given attributes that aren't listed here.
+    __slots__ = ("x", "y", "char", "color", "spatial_index")
+
     # Defining the inititial attributes of the Entity class, type hinting them and assigning them to instance variables
     def __init__(self, x: int, y: int, char: str, color: Tuple[int, int, int]):
         self.x = x
         self.y = y
         self.char = char
         self.color = color
+        # The spatial index this entity has been added to, if any. It is set by SpatialIndex.add and is used to tell the index whenever this entity changes position.
+        self.spatial_index: Optional[SpatialIndex] = None
 
     # the move method accepts parameters dx and dy which are type hinted as integers and returns nothing. It then adds the dx and dy parameters to the x and y instance variables defined above, which updates the position of the entitiy.
     def move(self, dx: int, dy: int) -> None:
         # Move the entity by a given amount
         self.x += dx
-        self.y += dy
\ No newline at end of file
+        self.y += dy
+        if self.spatial_index is not None:
+            self.spatial_index.update(self)
+
+    # the place method puts the entity at an exact position instead of moving it by an amount. Entities that are in a spatial index should always be repositioned with move or place, since setting x and y directly would leave the index pointing at the old position.
+    def place(self, x: int, y: int) -> None:
+        # Place the entity at a given position
+        self.x = x
+        self.y = y
+        if self.spatial_index is not None:
+            self.spatial_index.update(self)
+
+
+
+# EntityPool keeps entities that were despawned so they can be reused by the next spawn, instead of freeing one object and allocating another every time something dies and something else appears.
+class EntityPool:
+    """A pool of reusable Entity objects."""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._free: List[Entity] = []
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+    def acquire(self, x: int, y: int, char: str, color: Tuple[int, int, int]) -> Entity:
+        """Return an entity with the given attributes, reusing a released one if there is one."""
+        if not self._free:
+            return Entity(x, y, char, color)
+        entity = self._free.pop()
+        entity.x, entity.y, entity.char, entity.color = x, y, char, color
+        return entity
+
+    # Entities must be removed from the game (and its spatial index) before being released, since the pool will hand them out again as a different entity.
+    def release(self, entity: Entity) -> None:
+        """Return an entity to the pool."""
+        if entity.spatial_index is not None:
+            raise ValueError("Remove the entity from its spatial index before releasing it.")
+        if len(self._free) < self.max_size:
+            self._free.append(entity)
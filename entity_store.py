@@ -0,0 +1,157 @@
+# importing List, Optional, Tuple and Union from the typing module which provides support for type hints and annotations
+from typing import List, Optional, Tuple, Union
+
+# Imports the numpy library and assigns it to the variable np. The 'type: ignore' comment tells type checkers to ignore any type errors related to the numpy import.
+import numpy as np  # type: ignore
+
+# Imports the Console class, which the store renders onto.
+from tcod.console import Console
+
+# Imports the Camera class, which offsets the entities when only part of the map is shown.
+from camera import Camera
+
+# A chunked walkable mask (like GameMap.walkable on a chunked map) is read cell by cell, without turning it into a dense array.
+from chunked_array import ChunkedArray
+
+
+class EntityStore:
+    """Many simple entities kept as NumPy arrays instead of one Python object each.
+
+    Positions, glyph codepoints and colors are stored column by column
+    ("structure of arrays"), so rendering is one fancy-indexed write per field
+    and moving many entities is a single array operation. Entities are referred
+    to by integer handles which stay valid until the entity is removed.
+    """
+
+    # The arrays start with room for 'capacity' entities and double in size whenever they run out of room.
+    def __init__(self, capacity: int = 1024):
+        capacity = max(1, capacity)
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        # Unicode codepoints, the same as the 'ch' field of tile_types.graphic_dt.
+        self.ch = np.zeros(capacity, dtype=np.int32)
+        # RGB foreground colors, the same as the 'fg' field of tile_types.graphic_dt.
+        self.fg = np.zeros((capacity, 3), dtype=np.uint8)
+        # Entities are packed at the front of the arrays, so removing one moves the last entity into its slot. These two arrays translate between the stable handles given out by add and the slots that move around.
+        self._handle_of_slot = np.zeros(capacity, dtype=np.intp)
+        self._slot_of_handle = np.full(capacity, -1, dtype=np.intp)
+        self._free_handles: List[int] = []
+        self._next_handle = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def positions(self) -> np.ndarray:
+        """An (N, 2) array of the x and y of every entity, in slot order."""
+        return np.stack([self.x[: self.count], self.y[: self.count]], axis=1)
+
+    def add(self, x: int, y: int, char: str, color: Tuple[int, int, int]) -> int:
+        """Add an entity and return its handle."""
+        if self.count == len(self.x):
+            self._grow()
+        slot = self.count
+        self.x[slot], self.y[slot] = x, y
+        self.ch[slot] = ord(char)
+        self.fg[slot] = color
+        if self._free_handles:
+            handle = self._free_handles.pop()
+        else:
+            handle = self._next_handle
+            self._next_handle += 1
+            if handle >= len(self._slot_of_handle):
+                self._slot_of_handle = np.concatenate(
+                    [self._slot_of_handle, np.full(len(self._slot_of_handle), -1, dtype=np.intp)]
+                )
+        self._handle_of_slot[slot] = handle
+        self._slot_of_handle[handle] = slot
+        self.count += 1
+        return handle
+
+    def remove(self, handle: int) -> None:
+        """Remove the entity with the given handle."""
+        slot = self._slot(handle)
+        last = self.count - 1
+        # The last entity is moved into the removed entity's slot so the arrays stay packed.
+        if slot != last:
+            self.x[slot], self.y[slot] = self.x[last], self.y[last]
+            self.ch[slot] = self.ch[last]
+            self.fg[slot] = self.fg[last]
+            moved = self._handle_of_slot[last]
+            self._handle_of_slot[slot] = moved
+            self._slot_of_handle[moved] = slot
+        self._slot_of_handle[handle] = -1
+        self._free_handles.append(handle)
+        self.count = last
+
+    def clear(self) -> None:
+        """Remove every entity. Handles given out before are no longer valid."""
+        self.count = 0
+        self._slot_of_handle[:] = -1
+        self._free_handles.clear()
+        self._next_handle = 0
+
+    def position(self, handle: int) -> Tuple[int, int]:
+        """Return the (x, y) position of an entity."""
+        slot = self._slot(handle)
+        return int(self.x[slot]), int(self.y[slot])
+
+    # Moves entities by dx and dy, which can be single numbers or arrays with one value per moved entity. With 'handles' set to None every entity is moved. When a 'walkable' array (like GameMap.walkable) is given, entities whose destination is out of bounds or not walkable stay where they are, which is the same check MovementAction does one entity at a time.
+    def move(
+        self,
+        dx: Union[int, np.ndarray],
+        dy: Union[int, np.ndarray],
+        handles: Optional[np.ndarray] = None,
+        walkable: Optional[Union[np.ndarray, ChunkedArray]] = None,
+    ) -> None:
+        """Move many entities at once."""
+        if handles is None:
+            slots: Union[slice, np.ndarray] = slice(0, self.count)
+        else:
+            slots = self._slot_of_handle[np.asarray(handles, dtype=np.intp)]
+            if np.any(slots < 0):
+                raise KeyError("Can't move an entity which has been removed.")
+        dest_x = self.x[slots] + dx
+        dest_y = self.y[slots] + dy
+        if walkable is not None:
+            width, height = walkable.shape
+            ok = (0 <= dest_x) & (dest_x < width) & (0 <= dest_y) & (dest_y < height)
+            ok[ok] = walkable[dest_x[ok], dest_y[ok]]
+            dest_x = np.where(ok, dest_x, self.x[slots])
+            dest_y = np.where(ok, dest_y, self.y[slots])
+        self.x[slots] = dest_x
+        self.y[slots] = dest_y
+
+    # Draws every entity onto the console with one fancy-indexed write per field, instead of calling console.print once per entity. Only the glyph and foreground color are written, so the background color of the map shows through just like with console.print. Entities outside of the console (or outside of the camera's view) are skipped.
+    def render(self, console: Console, camera: Optional[Camera] = None) -> None:
+        """Draw every entity in the store onto the console."""
+        visible = self._visible_mask(console, camera)
+        xs, ys = self.x[: self.count][visible], self.y[: self.count][visible]
+        if camera is not None:
+            xs, ys = camera.to_screen(xs, ys)
+        console.tiles_rgb["ch"][xs, ys] = self.ch[: self.count][visible]
+        console.tiles_rgb["fg"][xs, ys] = self.fg[: self.count][visible]
+
+    def visible_cells(self, console: Console, camera: Optional[Camera] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the map x and y arrays of the entities which are drawn on the console."""
+        visible = self._visible_mask(console, camera)
+        return self.x[: self.count][visible], self.y[: self.count][visible]
+
+    def _visible_mask(self, console: Console, camera: Optional[Camera]) -> np.ndarray:
+        ox, oy = camera.position if camera is not None else (0, 0)
+        x, y = self.x[: self.count], self.y[: self.count]
+        return (ox <= x) & (x < ox + console.width) & (oy <= y) & (y < oy + console.height)
+
+    def _slot(self, handle: int) -> int:
+        if not 0 <= handle < len(self._slot_of_handle) or self._slot_of_handle[handle] < 0:
+            raise KeyError(f"No entity with handle {handle}.")
+        return int(self._slot_of_handle[handle])
+
+    def _grow(self) -> None:
+        capacity = len(self.x) * 2
+        for name in ("x", "y", "ch", "fg", "_handle_of_slot"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
@@ -0,0 +1,173 @@
+# Field of view. tcod.map.compute_fov works out which cells can be seen from a position over the map's transparency mask. The results are kept in a least recently used cache (a VersionedCache) keyed by the viewer's position and the radius, and emptied whenever the map's transparent mask changes, so a viewer standing still, stepping back and forth between cells, or several viewers on the same cell, only compute it once for as long as nothing is written which changes what blocks sight. With a radius only the square around the viewer is computed and cached, so the cache holds small windows rather than arrays the size of the map. compute_fov_batch computes the FOV of many viewers at once (like every monster on the map) on a thread pool.
+
+from __future__ import annotations
+
+# os.cpu_count decides how many pieces a batch is split into
+import os
+
+# ThreadPoolExecutor runs batches of FOV computations in parallel, Executor is the type of any pool that can run them
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+# time.perf_counter is used to measure the time spent computing FOV
+from time import perf_counter
+
+from typing import Dict, Optional, Tuple, TYPE_CHECKING, Union
+
+import numpy as np  # type: ignore
+import tcod.constants
+import tcod.map
+
+from versioned_cache import VersionedCache
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+# The default algorithm. Symmetric shadowcasting means that if A can see B, B can also see A.
+DEFAULT_ALGORITHM = tcod.constants.FOV_SYMMETRIC_SHADOWCAST
+
+
+# Computes the FOV of one viewer on the smallest part of the map it could need. Nothing further than the radius can be seen, so with a radius only the square around the viewer is computed, which is much faster than the whole map when the map is big. Returns the top left corner of that part and the visible cells in it.
+def _fov_window(
+    transparent: np.ndarray, x: int, y: int, radius: int, algorithm: int
+) -> Tuple[int, int, np.ndarray]:
+    width, height = transparent.shape
+    if radius <= 0:
+        return 0, 0, tcod.map.compute_fov(np.asarray(transparent), (x, y), radius, True, algorithm)
+    x0, y0 = max(0, x - radius), max(0, y - radius)
+    x1, y1 = min(width, x + radius + 1), min(height, y + radius + 1)
+    window = np.asarray(transparent[x0:x1, y0:y1])
+    return x0, y0, tcod.map.compute_fov(window, (x - x0, y - y0), radius, True, algorithm)
+
+
+def compute_fov(
+    transparent: np.ndarray, x: int, y: int, radius: int = 0, algorithm: int = DEFAULT_ALGORITHM
+) -> np.ndarray:
+    """Return the cells visible from (x, y) as a boolean array the shape of `transparent`.
+
+    A radius of 0 means there is no limit to how far can be seen.
+    """
+    return _expand(transparent.shape, *_fov_window(transparent, x, y, radius, algorithm))
+
+
+# Places a window of visible cells, with its top left corner at (x0, y0), in an array the size of the whole map.
+def _expand(shape: Tuple[int, int], x0: int, y0: int, window: np.ndarray) -> np.ndarray:
+    visible = np.zeros(shape, dtype=bool, order="F")
+    visible[x0:x0 + window.shape[0], y0:y0 + window.shape[1]] = window
+    return visible
+
+
+# The thread pool compute_fov_batch uses when it isn't given one. It is created the first time it is needed and shared from then on.
+_default_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = ThreadPoolExecutor(thread_name_prefix="fov")
+    return _default_executor
+
+
+def compute_fov_batch(
+    transparent: np.ndarray,
+    positions: np.ndarray,
+    radius: Union[int, np.ndarray] = 0,
+    algorithm: int = DEFAULT_ALGORITHM,
+    crop: bool = False,
+    executor: Optional[Executor] = None,
+) -> np.ndarray:
+    """Compute the FOV of many viewers at once on a thread pool.
+
+    `positions` is an (N, 2) array of viewer positions and `radius` is one
+    radius for every viewer or an (N,) array of them. Returns an
+    (N, width, height) boolean stack, or with `crop` an (N, 2R+1, 2R+1) stack
+    where R is the largest radius and cell [i, R, R] is viewer i's position.
+    """
+    transparent = np.asarray(transparent)
+    positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+    radii = np.broadcast_to(np.asarray(radius, dtype=np.intp), (len(positions),))
+    if crop:
+        reach = int(np.max(radius))
+        if (radii <= 0).any():
+            raise ValueError("A cropped batch needs a radius greater than 0 for every viewer.")
+        out = np.zeros((len(positions), 2 * reach + 1, 2 * reach + 1), dtype=bool)
+    else:
+        out = np.zeros((len(positions),) + transparent.shape, dtype=bool)
+
+    # Each task works through a slice of the viewers and writes straight into its own rows of 'out'. libtcod is called through cffi, which lets go of the GIL while the FOV is computed, so the threads really do run at the same time.
+    def work(first: int, last: int) -> None:
+        for i in range(first, last):
+            x, y = int(positions[i, 0]), int(positions[i, 1])
+            x0, y0, window = _fov_window(transparent, x, y, int(radii[i]), algorithm)
+            if crop:
+                # Shift the window so the viewer lands in the middle of its slot.
+                x0 -= x - reach
+                y0 -= y - reach
+            out[i, x0:x0 + window.shape[0], y0:y0 + window.shape[1]] = window
+
+    if executor is None:
+        executor = _executor()
+    # A few tasks per thread keeps every thread busy without paying the pool overhead once per viewer.
+    tasks = max(1, min(len(positions), 4 * (os.cpu_count() or 1)))
+    bounds = np.linspace(0, len(positions), tasks + 1).astype(int)
+    for future in [executor.submit(work, int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]:
+        future.result()
+    return out
+
+
+class FOVCache(VersionedCache[Tuple[int, int, int], Tuple[int, int, np.ndarray]]):
+    """Memoized field of view for one GameMap.
+
+    `window` returns a cached result when the same position and radius were
+    asked for since the map's transparent mask last changed, and otherwise
+    computes it and keeps it, dropping the least recently used result once
+    `max_size` are kept. A result is the part of the map the radius can
+    reach, as (x0, y0, visible) with the window's top left corner at
+    (x0, y0). The windows are shared between callers and read-only.
+    """
+
+    def __init__(self, game_map: GameMap, max_size: int = 64, algorithm: int = DEFAULT_ALGORITHM):
+        super().__init__(max_size, lambda: game_map.transparent_version)
+        self.game_map = game_map
+        self.algorithm = algorithm
+        # The total time spent in compute_fov, in seconds.
+        self.compute_time = 0.0
+
+    def window(self, x: int, y: int, radius: int = 0) -> Tuple[int, int, np.ndarray]:
+        """Return (x0, y0, visible), the cells visible from (x, y) on the map as it is now."""
+        key = (x, y, radius)
+        result = self.lookup(key)
+        if result is not None:
+            return result
+
+        start = perf_counter()
+        result = _fov_window(self.game_map.transparent, x, y, radius, self.algorithm)
+        self.compute_time += perf_counter() - start
+        result[2].flags.writeable = False
+        return self.store(key, result)
+
+    # Expanding the window allocates an array the size of the whole map on every call, so callers which only need a few cells (or the cells near the viewer) should use 'window' instead.
+    def compute(self, x: int, y: int, radius: int = 0) -> np.ndarray:
+        """Return the cells visible from (x, y) as a new boolean array the size of the map."""
+        return _expand((self.game_map.width, self.game_map.height), *self.window(x, y, radius))
+
+    def is_visible(self, x: int, y: int, radius: int, target_x: int, target_y: int) -> bool:
+        """Return True if (target_x, target_y) can be seen from (x, y)."""
+        x0, y0, visible = self.window(x, y, radius)
+        i, j = target_x - x0, target_y - y0
+        return bool(0 <= i < visible.shape[0] and 0 <= j < visible.shape[1] and visible[i, j])
+
+    def stats(self) -> Dict[str, float]:
+        """Return the cache counters and the time spent computing FOV, in milliseconds."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "cached": len(self),
+            "compute_ms": self.compute_time * 1000,
+            "mean_compute_ms": self.compute_time * 1000 / self.misses if self.misses else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Drop every cached result and reset the counters."""
+        super().clear()
+        self.compute_time = 0.0
@@ -0,0 +1,106 @@
+# importing json, which is used to write the timings to a file
+import json
+
+# time.perf_counter is the highest resolution clock python has, it is what every phase is timed with.
+from time import perf_counter
+
+# importing the type hints used in this module from the typing module
+from typing import Dict, Optional, Sequence
+
+# Imports the numpy library and assigns it to the variable np. The 'type: ignore' comment tells type checkers to ignore any type errors related to the numpy import.
+import numpy as np  # type: ignore
+
+# The phases of a frame that the Engine times, in the order they happen. 'handle_events' is the time spent turning events into actions and performing them, 'map_render' is GameMap.render, 'entity_render' covers erasing and drawing the entities and 'present' is context.present. The time spent waiting for input in tcod.event.wait() is not part of any phase, since it is idle time and not work.
+PHASES = ("handle_events", "map_render", "entity_render", "present")
+
+
+class FrameTimer:
+    """Records how long each phase of a frame takes, for the last `capacity` frames.
+
+    The Engine calls `begin_frame` at the start of every frame and `lap` after
+    each phase, and `end_frame` stores the last frame when the game stops.
+    Timings are kept in a fixed size ring buffer so a long session doesn't
+    grow memory. To turn timing off, set `Engine.timer` to None, which
+    leaves a single `is None` check per phase.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        # One row per frame and one column per phase, in seconds. Once the buffer is full the oldest frame is overwritten.
+        self.samples = np.zeros((capacity, len(PHASES)), dtype=np.float64)
+        self.count = 0
+        self._next_row = 0
+        # The phase timings of the frame in progress. They are copied into self.samples when the next frame begins.
+        self._current = np.zeros(len(PHASES), dtype=np.float64)
+        self._in_frame = False
+        self._last = perf_counter()
+        self._phase_index = {name: i for i, name in enumerate(PHASES)}
+
+    # Starts a new frame. The frame before it (its render plus the events handled after it) is stored in the ring buffer.
+    def begin_frame(self) -> None:
+        """Finish the previous frame and start timing a new one."""
+        self.end_frame()
+        self._in_frame = True
+        self._last = perf_counter()
+
+    # A frame is only complete once the events handled after its render have been timed, so it is normally stored when the next frame begins. The last frame of a session has no next frame, so whatever stops the game loop calls this before reading the timings. Calling it again, or outside of a frame, does nothing.
+    def end_frame(self) -> None:
+        """Store the frame in progress, if there is one."""
+        if not self._in_frame:
+            return
+        self.samples[self._next_row] = self._current
+        self._next_row = (self._next_row + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self._current[:] = 0.0
+        self._in_frame = False
+
+    # Starts the clock for a phase without recording anything, used before a phase that doesn't directly follow another one (like handle_events, which comes after waiting for input).
+    def restart(self) -> None:
+        """Reset the clock without recording the time since the last lap."""
+        self._last = perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """Add the time since the last lap (or restart) to `phase`."""
+        now = perf_counter()
+        self._current[self._phase_index[phase]] += now - self._last
+        self._last = now
+
+    def frames(self) -> np.ndarray:
+        """Return the recorded frames, oldest first, as an (N, len(PHASES)) array of seconds."""
+        if self.count < self.capacity:
+            return self.samples[: self.count].copy()
+        return np.roll(self.samples, -self._next_row, axis=0)
+
+    def percentiles(self, q: Sequence[float] = (50, 95, 99)) -> Dict[str, Dict[str, float]]:
+        """Return the requested percentiles in milliseconds for every phase and for the whole frame."""
+        frames = self.frames()
+        result: Dict[str, Dict[str, float]] = {}
+        columns = {name: frames[:, i] for i, name in enumerate(PHASES)}
+        columns["total"] = frames.sum(axis=1)
+        for name, values in columns.items():
+            if values.size == 0:
+                result[name] = {f"p{p:g}": 0.0 for p in q}
+            else:
+                result[name] = {f"p{p:g}": float(v) * 1000 for p, v in zip(q, np.percentile(values, q))}
+        return result
+
+    def histogram(self, bins: int = 20, phase: Optional[str] = None) -> Dict[str, list]:
+        """Return a histogram of frame (or phase) times, with bin edges in milliseconds."""
+        frames = self.frames()
+        values = frames.sum(axis=1) if phase is None else frames[:, self._phase_index[phase]]
+        counts, edges = np.histogram(values * 1000, bins=bins)
+        return {"counts": counts.tolist(), "edges_ms": edges.tolist()}
+
+    def to_dict(self) -> dict:
+        """Return a summary of the recorded timings which can be written as JSON."""
+        return {
+            "frames": self.count,
+            "phases": list(PHASES),
+            "percentiles_ms": self.percentiles(),
+            "histogram": self.histogram(),
+        }
+
+    def dump_json(self, path: str) -> None:
+        """Write the summary from `to_dict` to a JSON file."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
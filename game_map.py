@@ -4,19 +4,267 @@
 
 import numpy as np  # type: ignore
 
+# importing Optional from the typing module. 'Optional[int]' means the value can either be an int or None.
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
 # Imports the Console class from the tcod.console module. The Console class is used to create a console object which is used to display text and graphics on the screen.
 from tcod.console import Console
 
+# Imports the Camera class, which decides which part of the map is drawn when the map is bigger than the console.
+from camera import Camera
+
 # This statement imports the tile_types.py functions and variables, which allows for their use in this file.
 import tile_types
 
-# Declares the GameMap class with width and height as __init__ parameters, type hinted as integers. Also assigns them as instance attributes.
+# label_regions finds the connected regions of the walkable cells.
+from connectivity import NO_REGION, label_chunked_regions, label_regions
+
+# FOVCache computes field of view over the map and remembers the results.
+from fov import FOVCache
+
+# GoalMaps computes the shared Dijkstra distance maps monsters use to find their way to the player.
+from goal_maps import GoalMaps
+
+# PathCache finds A* paths between two cells and remembers them until a tile write could change them.
+from path_cache import PathCache
+
+# Imports the ChunkedArray class which stores the map in chunks that are only allocated once they are dug into.
+from chunked_array import ChunkedArray, parse_index
+
+# The tile fields a GameMap keeps a per-cell mask of. Their lookup tables are fetched with tile_types.field_lut every time they are used, since registering a tile type replaces the tables.
+_MASK_FIELDS = ("walkable", "transparent")
+
+# When more regions than this have changed since the last frame (for example while a dungeon is being dug) it is cheaper to redraw the whole map than to go through every region one by one.
+MAX_DIRTY_RECTS = 64
+
+# TileGrid lets the rest of the game keep reading and writing 'game_map.tiles' as if it held 'tile_dt' values, while the map itself only stores one small tile ID per cell. Reads turn IDs back into tiles through the lookup tables in tile_types.py, and writes turn tiles into their IDs.
+class TileGrid:
+    """A `tile_dt` view of a grid of tile IDs."""
+
+    def __init__(self, ids: Union[np.ndarray, ChunkedArray], on_write: Optional[Callable[[Any], None]] = None):
+        self.ids = ids
+        self.shape = ids.shape
+        self.dtype = tile_types.tile_dt
+        # Called with the index of every write, this is how the GameMap finds out that its tiles changed.
+        self.on_write = on_write
+
+    def __array__(self, dtype: Any = None) -> np.ndarray:
+        tiles = tile_types.tile_lut[np.asarray(self.ids)]
+        if dtype is not None:
+            return tiles.astype(dtype)
+        return tiles
+
+    # A string key like tiles["walkable"] returns a TileField so that tiles["walkable"][x, y] only looks up the cells that are asked for.
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, str):
+            return TileField(self.ids, key)
+        return tile_types.tile_lut[self.ids[key]]
+
+    # Accepts either tiles (like tile_types.floor) or tile IDs (like tile_types.floor_id).
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.ids[key] = tile_types.tile_ids_of(value)
+        if self.on_write is not None:
+            self.on_write(key)
+
+
+class TileField:
+    """A read only view of a single `tile_dt` field, like `tiles["walkable"]`."""
+
+    def __init__(self, ids: Union[np.ndarray, ChunkedArray], name: str):
+        self.ids = ids
+        self.lut = tile_types.field_lut(name)
+        self.shape = ids.shape
+        self.dtype = self.lut.dtype
+
+    def __array__(self, dtype: Any = None) -> np.ndarray:
+        values = self.lut[np.asarray(self.ids)]
+        if dtype is not None:
+            return values.astype(dtype)
+        return values
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.lut[self.ids[key]]
+
+
+# Declares the GameMap class with width and height as __init__ parameters, type hinted as integers. Also assigns them as instance attributes. The optional chunk_size parameter selects the chunked backend which is meant for very large worlds.
 class GameMap:
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, chunk_size: Optional[int] = None):
         self.width, self.height = width, height
-        # Creates a numpy array of the specified width and height and fills it with the value of tile_types.floor. The order="F" parameter tells numpy to store the array in column major order, which is the order that tcod expects. self.tiles is assigned as an instance attribute to a newly created numpy array (using np.full)of the specified width and height and filled with the value of tile_types.wall.
-        self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+        # Each cell stores the registry ID of its tile type (see tile_types.py) instead of a full copy of 'tile_dt', which is 12 times smaller. The tile properties are looked up with tables like 'tile_types.walkable_lut[ids]'.
+        self.tile_ids: Union[np.ndarray, ChunkedArray]
+        if chunk_size is None:
+            # Creates a numpy array of the specified width and height filled with the ID of tile_types.wall. The order="F" parameter tells numpy to store the array in column major order, which is the order that tcod expects.
+            self.tile_ids = np.full((width, height), fill_value=tile_types.wall_id, dtype=tile_types.tile_id_dt, order="F")
+        else:
+            # A dense array for a 10k x 10k map would take a lot of memory before a single room is dug. The ChunkedArray only allocates a chunk_size x chunk_size block when something other than a wall is written into it, and unwritten blocks read back as tile_types.wall_id. It supports the same [...] indexing as the numpy array so the rest of the code doesn't need to know which backend is used.
+            self.tile_ids = ChunkedArray((width, height), tile_types.tile_id_dt, tile_types.wall_id, chunk_size)
+
+        # self.tiles keeps the tiles[...] interface used by procgen.py and actions.py, e.g. 'tiles[room.inner] = tile_types.floor' and 'tiles["walkable"][x, y]'. All tile writes should go through self.tiles so that the map knows it changed.
+        self.tiles = TileGrid(self.tile_ids, on_write=self._on_tiles_written)
+
+        # The version goes up by one on every tile write. Anything computed from the tiles (masks, FOV, paths) can remember the version it was computed at and only redo the work when the version has moved on.
+        self.version = 0
+
+        # The walkable and transparent masks, built the first time they are read and patched in place by every write after that.
+        self._masks: Dict[str, Union[np.ndarray, ChunkedArray]] = {}
+
+        # The number of writes which changed each mask. Values computed from a mask (like the packed masks) remember the count they were built at, so a write which doesn't change the mask (floor written over floor) doesn't throw them away.
+        self._mask_versions: Dict[str, int] = {name: 0 for name in _MASK_FIELDS}
+
+        # Cached values computed from the masks, keyed by name, along with the mask version they were built at.
+        self._mask_cache: Dict[str, Tuple[int, Any]] = {}
 
+        # Field of view on this map, cached per viewer position and radius until a write changes what blocks sight. Use 'game_map.fov.window(x, y, radius)' for the part of the map the radius reaches, or 'game_map.fov.compute(x, y, radius)' for a whole map array.
+        self.fov = FOVCache(self)
+
+        # Distance maps to sets of goals (like the player), cached until a goal moves or a write changes the walkable mask. Monsters read their next step with 'game_map.goal_maps.get([(player.x, player.y)]).next_step(x, y)'.
+        self.goal_maps = GoalMaps(self)
+
+        # A* paths between pairs of cells, kept across tile writes that don't affect them. Use 'game_map.path(start, goal)'. The walkable mask tells the cache which cells a write opened or blocked.
+        self.paths = PathCache(self)
+
+        # The regions of the map written since the last call to render, as (x0, y0, x1, y1) rectangles where x1 and y1 are exclusive. render only redraws these regions unless a full redraw is needed, which is always the case for the first frame.
+        self.dirty_rects: List[Tuple[int, int, int, int]] = []
+        self.needs_full_redraw = True
+
+    # Called by self.tiles after every write.
+    def _on_tiles_written(self, key: Any) -> None:
+        self.version += 1
+        parsed = parse_index(key, (self.width, self.height))
+        changed = self._patch_masks(parsed)
+        if "walkable" in changed:
+            self.paths.walkable_changed(*changed["walkable"])
+        if self.needs_full_redraw:
+            return
+        rect = self._index_bounds(parsed)
+        if rect is None:
+            return
+        if len(self.dirty_rects) >= MAX_DIRTY_RECTS:
+            self.mark_all_dirty()
+        else:
+            self.dirty_rects.append(rect)
+
+    # Brings the masks up to date after a write, given the written index as returned by parse_index. Only the written cells are looked up, and only the ones whose value changed are written into the mask, so writing one tile costs the same on a 10k x 10k chunked map as on a small one, and never allocates mask chunks the map itself doesn't have. Returns the x and y arrays of the cells that changed in each mask, for the masks where any did.
+    def _patch_masks(self, parsed: Tuple[Any, ...]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        changes: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        if not self._masks:
+            return changes
+        if parsed[0] == "rect":
+            x0, x1, y0, y1 = parsed[1]
+            index: Tuple[Any, Any] = (slice(x0, x1), slice(y0, y1))
+        else:
+            index = (parsed[1], parsed[2])
+        ids = np.asarray(self.tile_ids[index])
+        for name, mask in self._masks.items():
+            values = tile_types.field_lut(name)[ids]
+            changed = np.asarray(mask[index]) != values
+            if not changed.any():
+                continue
+            if parsed[0] == "rect":
+                xs, ys = np.nonzero(changed)
+                xs, ys = xs + x0, ys + y0
+            else:
+                xs, ys = index[0][changed], index[1][changed]
+            mask[xs, ys] = values[changed]
+            self._mask_versions[name] += 1
+            changes[name] = xs, ys
+        return changes
+
+    # Returns the smallest rectangle containing every cell selected by an index (as returned by parse_index), or None if the index selects no cells.
+    def _index_bounds(self, parsed: Tuple[Any, ...]) -> Optional[Tuple[int, int, int, int]]:
+        if parsed[0] == "rect":
+            x0, x1, y0, y1 = parsed[1]
+            if x1 <= x0 or y1 <= y0:
+                return None
+            return x0, y0, x1, y1
+        _, xs, ys = parsed
+        if xs.size == 0:
+            return None
+        return int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1
+
+    def mark_all_dirty(self) -> None:
+        """Make the next render redraw the whole map, for example after the console was cleared."""
+        self.needs_full_redraw = True
+        self.dirty_rects.clear()
+
+    # Returns a cached value built by 'build' from the mask called 'mask', rebuilding it only when that mask has changed since it was last built.
+    def _cached(self, name: str, mask: str, build: Callable[[], Any]) -> Any:
+        version = self._mask_versions[mask]
+        cached = self._mask_cache.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        value = build()
+        self._mask_cache[name] = (version, value)
+        return value
+
+    def _mask(self, name: str) -> Union[np.ndarray, ChunkedArray]:
+        mask = self._masks.get(name)
+        if mask is None:
+            mask = self._masks[name] = self._lookup(tile_types.field_lut(name))
+        return mask
+
+    def _lookup(self, lut: np.ndarray) -> Union[np.ndarray, ChunkedArray]:
+        if isinstance(self.tile_ids, ChunkedArray):
+            return self.tile_ids.lookup(lut)
+        return np.asfortranarray(lut[self.tile_ids])
+
+    # The walkable and transparent properties return a contiguous boolean array of the whole map, which is much faster to index than pulling the field out of the tiles on every read. Movement, pathing and FOV should use these. On the chunked backend they are ChunkedArrays with the same chunks as the map, so they don't allocate the unexplored parts of the world. Each mask is built once and then patched in place by every tile write, so a write never means rebuilding the whole mask. The arrays are shared, so they must not be written to, and anything which needs the mask as it was at one moment has to copy it.
+    @property
+    def walkable(self) -> Union[np.ndarray, ChunkedArray]:
+        """A cached boolean array which is True where the map can be walked over."""
+        return self._mask("walkable")
+
+    @property
+    def transparent(self) -> Union[np.ndarray, ChunkedArray]:
+        """A cached boolean array which is True where the map doesn't block FOV."""
+        return self._mask("transparent")
+
+    # The number of writes which changed the walkable or transparent mask so far. Caches of things worked out from one mask (like FOV from the transparent mask) can compare these instead of 'version', so they survive writes which don't change what they depend on. A mask is only compared with the writes once it has been built, so its version doesn't move before anything can have been worked out from it.
+    @property
+    def walkable_version(self) -> int:
+        return self._mask_versions["walkable"]
+
+    @property
+    def transparent_version(self) -> int:
+        return self._mask_versions["transparent"]
+
+    # The packed versions store 8 cells per byte using np.packbits along the y axis, so cell (x, y) is bit 'y % 8' (counting from the highest bit) of byte [x, y // 8]. They use an eighth of the memory, which helps when a mask has to be copied or sent to another process.
+    @property
+    def walkable_packed(self) -> np.ndarray:
+        """The walkable mask packed into bits along the y axis."""
+        return self._cached("walkable_packed", "walkable", lambda: np.packbits(np.asarray(self.walkable), axis=1))
+
+    @property
+    def transparent_packed(self) -> np.ndarray:
+        """The transparent mask packed into bits along the y axis."""
+        return self._cached("transparent_packed", "transparent", lambda: np.packbits(np.asarray(self.transparent), axis=1))
+
+    # The connected regions of the walkable cells, labelled by connectivity.label_regions and kept until a write changes which cells can be walked on. On the chunked backend the labels are a ChunkedArray with the same chunks as the map (see connectivity.label_chunked_regions), so they never need memory for the whole world.
+    @property
+    def regions(self) -> Union[np.ndarray, ChunkedArray]:
+        """A cached int32 array of the region ID of every walkable cell, -1 elsewhere."""
+        return self._cached("regions", "walkable", self._label_regions)[0]
+
+    @property
+    def region_sizes(self) -> np.ndarray:
+        """The number of cells in each region of `regions`."""
+        return self._cached("regions", "walkable", self._label_regions)[1]
+
+    def _label_regions(self) -> Tuple[Union[np.ndarray, ChunkedArray], np.ndarray]:
+        walkable = self.walkable
+        if isinstance(walkable, ChunkedArray):
+            return label_chunked_regions(walkable)
+        return label_regions(walkable)
+
+    def is_reachable(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """Return True if `end` can be walked to from `start`."""
+        regions = self.regions
+        region = regions[start]
+        return bool(region != NO_REGION and region == regions[end])
+
+    def path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Return the cells walked through from `start` to `goal`, or an empty list if it can't be reached."""
+        return self.paths.path(start, goal)
 
     # This function takes x and y parameters and returns True if the x and y values are within the bounds of the map.
     def in_bounds(self, x: int, y: int) -> bool:
@@ -33,6 +281,33 @@ class GameMap:
 
     To update console.tiles_rgb with the "dark" values from self.tiles, the self.tiles["dark"] expression is used to extract the "dark" field values as a sub-array, which has the same shape as console.tiles_rgb. This sub-array is then assigned to the corresponding region of console.tiles_rgb, effectively updating the appearance of tiles on the console.
 
-    The conversion of tile types to RGB values is not directly related to self.tiles["dark"]. The mapping between tile types and RGB values is typically defined separately, often in the tile_types.py file or a related module. self.tiles["dark"] assumes that the "dark" field of each tile element already contains the appropriate RGB values for the tile's appearance in the dark. """
-    def render(self, console: Console) -> None:
-        console.tiles_rgb[0:self.width, 0:self.height] = self.tiles["dark"]
\ No newline at end of file
+    The conversion of tile types to RGB values is not directly related to self.tiles["dark"]. The mapping between tile types and RGB values is typically defined separately, often in the tile_types.py file or a related module. self.tiles["dark"] assumes that the "dark" field of each tile element already contains the appropriate RGB values for the tile's appearance in the dark.
+
+    Since the map stores tile IDs rather than tile_dt values, the "dark" graphics are looked up with tile_types.dark_lut[ids], which gives the same graphic_dt array that self.tiles["dark"] would. """
+    def render(self, console: Console, camera: Optional[Camera] = None) -> None:
+        # Without a camera the whole map is drawn at the top left of the console. With a camera only the part of the map inside the camera's view is drawn, so the cost depends on the size of the console and not on the size of the map.
+        x0, y0, x1, y1 = self._view(camera)
+
+        # The first frame (or any frame after mark_all_dirty) redraws the whole view. After that only the regions written since the previous frame are copied, everything else on the console is still correct from the last frame. Regions outside the view are skipped.
+        if self.needs_full_redraw:
+            console.tiles_rgb[0:x1 - x0, 0:y1 - y0] = tile_types.dark_lut[self.tile_ids[x0:x1, y0:y1]]
+        else:
+            for rx0, ry0, rx1, ry1 in self.dirty_rects:
+                rx0, ry0, rx1, ry1 = max(rx0, x0), max(ry0, y0), min(rx1, x1), min(ry1, y1)
+                if rx0 < rx1 and ry0 < ry1:
+                    console.tiles_rgb[rx0 - x0:rx1 - x0, ry0 - y0:ry1 - y0] = tile_types.dark_lut[self.tile_ids[rx0:rx1, ry0:ry1]]
+        self.needs_full_redraw = False
+        self.dirty_rects.clear()
+
+    # Redraws the map graphics of individual cells, given as arrays of x and y map coordinates. The Engine uses this to erase entities from the cells they were drawn on in the previous frame. Cells outside the camera's view are skipped.
+    def render_cells(self, console: Console, xs: np.ndarray, ys: np.ndarray, camera: Optional[Camera] = None) -> None:
+        """Copy the map graphics of the given cells onto the console."""
+        x0, y0, x1, y1 = self._view(camera)
+        inside = (x0 <= xs) & (xs < x1) & (y0 <= ys) & (ys < y1)
+        xs, ys = xs[inside], ys[inside]
+        console.tiles_rgb[xs - x0, ys - y0] = tile_types.dark_lut[self.tile_ids[xs, ys]]
+
+    def _view(self, camera: Optional[Camera]) -> Tuple[int, int, int, int]:
+        if camera is None:
+            return 0, 0, self.width, self.height
+        return camera.view(self.width, self.height)
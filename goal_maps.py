@@ -0,0 +1,94 @@
+# Shared Dijkstra distance maps ("goal maps") for monster pathing. Instead of every monster running its own A* search every turn, one distance map is computed per set of goals (like the player's position) with tcod.path.dijkstra2d, and every monster chasing those goals reads its next step from the distances of its four neighbours in the same map. The maps are kept in a least recently used cache keyed by the goals and emptied whenever the walkable mask changes, so a map is only computed again once a goal moves or a write changes where monsters can walk, and the cost of a turn grows with the number of different goals rather than the number of monsters.
+
+from __future__ import annotations
+
+from typing import Iterable, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+import tcod.path
+
+from versioned_cache import VersionedCache
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+# The distance of a cell from which no goal can be reached. tcod.path.maxarray fills the distance map with this before the search.
+UNREACHABLE = np.iinfo(np.int32).max
+
+# The moves a monster can make, the same four as the player's movement keys.
+_STEPS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.int8)
+
+
+class GoalMap:
+    """The distance from every cell to the nearest of a set of goals.
+
+    `distance` is an int32 array the shape of the map holding the number of
+    moves to the nearest goal (UNREACHABLE where no goal can be reached).
+    `next_step` and `next_steps` read the move which gets one step closer
+    from the four neighbours of a cell.
+    """
+
+    def __init__(self, walkable: np.ndarray, goals: Tuple[Tuple[int, int], ...]):
+        self.goals = goals
+        self.distance = tcod.path.maxarray(walkable.shape, dtype=np.int32, order="F")
+        for x, y in goals:
+            self.distance[x, y] = 0
+        tcod.path.dijkstra2d(self.distance, walkable.astype(np.int8), cardinal=1, out=self.distance)
+        self.distance.flags.writeable = False
+
+    # The best move is to the first neighbour (in _STEPS order) with the smallest distance, as long as it is closer than the cell itself. Only the distance map is kept, a table of the best move from every cell would be several times its size, and reading four neighbours is still a constant amount of work per monster.
+    def next_step(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        """Return the (dx, dy) move from (x, y) towards the nearest goal, or None if there is none to make."""
+        width, height = self.distance.shape
+        best, step = self.distance[x, y], None
+        for dx, dy in _STEPS.tolist():
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and self.distance[nx, ny] < best:
+                best, step = self.distance[nx, ny], (dx, dy)
+        return step
+
+    # For monsters kept in numpy arrays (like an EntityStore), all of their moves are read with four whole-array lookups.
+    def next_steps(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Return an (N, 2) array of the moves from every (xs[i], ys[i]), (0, 0) where there is none."""
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=np.intp), np.asarray(ys, dtype=np.intp))
+        width, height = self.distance.shape
+        best = self.distance[xs, ys]
+        steps = np.zeros(xs.shape + (2,), dtype=np.int8)
+        for dx, dy in _STEPS.tolist():
+            nx, ny = xs + dx, ys + dy
+            inside = (0 <= nx) & (nx < width) & (0 <= ny) & (ny < height)
+            distance = np.full(xs.shape, UNREACHABLE, dtype=np.int32)
+            distance[inside] = self.distance[nx[inside], ny[inside]]
+            closer = distance < best
+            best = np.where(closer, distance, best)
+            steps[closer] = dx, dy
+        return steps
+
+
+class GoalMaps(VersionedCache[Tuple[Tuple[int, int], ...], GoalMap]):
+    """The goal maps of one GameMap, cached by goals.
+
+    `get` returns the GoalMap of a set of goals, computing it only when it
+    isn't already cached since the map's walkable mask last changed. Asking
+    for the same goals in a different order gives the same map. At most
+    `max_size` maps are kept, dropping the least recently used one.
+    """
+
+    def __init__(self, game_map: GameMap, max_size: int = 16):
+        super().__init__(max_size, lambda: game_map.walkable_version)
+        self.game_map = game_map
+
+    def get(self, goals: Iterable[Tuple[int, int]]) -> GoalMap:
+        """Return the goal map for the given goal positions on the map as it is now."""
+        # Sorted and without duplicates, so the same goals always make the same key.
+        goal_cells = tuple(sorted({(int(x), int(y)) for x, y in goals}))
+        if not goal_cells:
+            raise ValueError("A goal map needs at least one goal.")
+        goal_map = self.lookup(goal_cells)
+        if goal_map is not None:
+            return goal_map
+        return self.store(goal_cells, GoalMap(np.asarray(self.game_map.walkable), goal_cells))
+
+    def next_step(self, x: int, y: int, goals: Iterable[Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+        """Return the (dx, dy) move from (x, y) towards the nearest of `goals`, or None if there is none to make."""
+        return self.get(goals).next_step(x, y)
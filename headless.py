@@ -0,0 +1,70 @@
+# Running the Engine without a window. The normal game loop in main.py needs a tcod context (a window) to present the console and waits for input with tcod.event.wait(). Here the events come from a script instead, and the console is an offscreen Console which is drawn to but never shown (or nothing is rendered at all). This lets the game run on build servers and in simulation workers.
+
+# this line allows for the future resolution of type hints
+from __future__ import annotations
+
+# importing the type hints used in this module from the typing module
+from typing import Any, Iterable, List, Optional, TYPE_CHECKING
+
+import tcod.event
+from tcod.console import Console
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+
+# ScriptedEventSource stands in for tcod.event.wait(). Every call returns the next batch of events from the script, and an empty list once the script has run out.
+class ScriptedEventSource:
+    """Plays back a fixed sequence of events, `batch_size` events per call."""
+
+    def __init__(self, events: Iterable[Any], batch_size: int = 1):
+        self.events = list(events)
+        self.batch_size = batch_size
+        self.position = 0
+
+    @property
+    def exhausted(self) -> bool:
+        """True once every event has been returned."""
+        return self.position >= len(self.events)
+
+    def __call__(self) -> List[Any]:
+        batch = self.events[self.position:self.position + self.batch_size]
+        self.position += len(batch)
+        return batch
+
+
+def key_events(keys: Iterable[int]) -> List[tcod.event.KeyDown]:
+    """Turn key symbols like tcod.event.K_UP into KeyDown events."""
+    return [tcod.event.KeyDown(scancode=0, sym=key, mod=0) for key in keys]
+
+
+def offscreen_console(width: int, height: int) -> Console:
+    """Create a console to render into when there is no window."""
+    return Console(width, height, order="F")
+
+
+# The headless version of the game loop in main.py. Each frame renders into 'console' (unless it is None, in which case rendering is skipped entirely), then takes the next batch of events from the event source and handles them. The loop stops when the event source runs out, after 'max_frames' frames, or when an action raises SystemExit (the escape key). With a FrameTimer on the engine every frame is timed, rendered or not. Returns the number of frames that were run.
+def run_headless(
+    engine: Engine,
+    event_source: ScriptedEventSource,
+    console: Optional[Console] = None,
+    max_frames: Optional[int] = None,
+) -> int:
+    """Run the game loop without a window and return the number of frames run."""
+    frames = 0
+    timer = engine.timer
+    while not event_source.exhausted and (max_frames is None or frames < max_frames):
+        if console is not None:
+            engine.render(console)
+        elif timer is not None:
+            # Engine.render starts every frame of the timer, so without rendering the frames are started here.
+            timer.begin_frame()
+        try:
+            engine.handle_events(event_source())
+        except SystemExit:
+            frames += 1
+            break
+        frames += 1
+    if timer is not None:
+        timer.end_frame()
+    return frames
@@ -5,7 +5,17 @@ from typing import Optional
 import tcod.event
 
 # import Action, EscapeAction, and MovementAction from actions.py
-from actions import Action, EscapeAction, MovementAction
+from actions import Action, DescendAction, EscapeAction, MovementAction
+
+# Actions don't change after they are created, so instead of creating a new MovementAction on every keypress one action is created per key here (this is called a flyweight) and the same object is returned every time that key is pressed. This saves an allocation on every turn.
+MOVE_KEYS = {
+    tcod.event.K_UP: MovementAction(dx=0, dy=-1),
+    tcod.event.K_DOWN: MovementAction(dx=0, dy=1),
+    tcod.event.K_LEFT: MovementAction(dx=-1, dy=0),
+    tcod.event.K_RIGHT: MovementAction(dx=1, dy=0),
+}
+ESCAPE_ACTION = EscapeAction()
+DESCEND_ACTION = DescendAction()
 
 # The EventHandler class inherits from or is a subclass of 'tcod.event.EventDispatch[Action]' which means that  is extends the generic event dispatcher to handle events specific to the 'Action' class
 class EventHandler(tcod.event.EventDispatch[Action]):
@@ -23,18 +33,16 @@ class EventHandler(tcod.event.EventDispatch[Action]):
         # 'event.sym' returns the key code of the key that was pressed. This is used to determine which key was pressed.
         key = event.sym
 
-        # The 'if' statements check if the key pressed matches one of the keys that are handled. If it does, then 'action' is set to the corresponding 'Action' subclass.
-        if key == tcod.event.K_UP:
-            action = MovementAction(dx=0, dy=-1)
-        elif key == tcod.event.K_DOWN:
-            action = MovementAction(dx=0, dy=1)
-        elif key == tcod.event.K_LEFT:
-            action = MovementAction(dx=-1, dy=0)
-        elif key == tcod.event.K_RIGHT:
-            action = MovementAction(dx=1, dy=0)
+        # The 'if' statements check if the key pressed matches one of the keys that are handled. If it does, then 'action' is set to the shared action for that key (see MOVE_KEYS above).
+        if key in MOVE_KEYS:
+            action = MOVE_KEYS[key]
 
         elif key == tcod.event.K_ESCAPE:
-            action = EscapeAction()
+            action = ESCAPE_ACTION
+
+        # '>' (shift and period) takes the stairs down. 'event.mod' holds the modifier keys which were held down with the key.
+        elif key == tcod.event.K_PERIOD and event.mod & tcod.event.KMOD_SHIFT:
+            action = DESCEND_ACTION
 
         # No valid key was pressed which means that action defualts to 'None'
         return action
\ No newline at end of file
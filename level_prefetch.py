@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+# ThreadPoolExecutor runs the level generation in a background thread, and Future is the handle to a result which might not be ready yet
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from typing import Callable, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+# A level generator takes a seed and returns the new GameMap along with the position the player starts at. It must not touch the live game (like the player entity), since it runs in the background while the current floor is being played.
+LevelGenerator = Callable[[int], Tuple["GameMap", Tuple[int, int]]]
+
+
+class LevelPrefetcher:
+    """Generates the next floor in a background thread while the current one is played.
+
+    Call `prefetch` as soon as a floor loads, and `take` when the player takes
+    the stairs. `take` only has to wait if the next floor isn't finished yet.
+    With `background` off nothing runs ahead and `take` generates the floor
+    itself. Call `close` when the game ends.
+    """
+
+    # The seeds of the floors are drawn from a generator seeded with 'seed', so a game started from the same seed always gets the same floors in the same order, whether they are generated in the background or not.
+    def __init__(self, generate: LevelGenerator, seed: Optional[int] = None, background: bool = True):
+        self.generate = generate
+        self.rng = np.random.default_rng(seed)
+        # A single worker thread is enough, there is only ever one floor being prepared. A thread is used rather than a process because the finished GameMap can be handed over directly, and the game loop spends most of its time waiting for input in tcod.event.wait(), which lets the worker run.
+        self._executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-prefetch") if background else None
+        )
+        self._pending: Optional[Future] = None
+        # Without a worker, the seed of the next floor is drawn by prefetch like it would be with one, and kept here until take generates the floor.
+        self._next_seed: Optional[int] = None
+
+    @property
+    def ready(self) -> bool:
+        """True if the next floor has finished generating."""
+        return self._pending is not None and self._pending.done()
+
+    def prefetch(self) -> None:
+        """Start generating the next floor, unless it has already been started."""
+        if self._pending is None and self._next_seed is None:
+            seed = int(self.rng.integers(2**63))
+            if self._executor is None:
+                self._next_seed = seed
+            else:
+                self._pending = self._executor.submit(self.generate, seed)
+
+    def take(self) -> Tuple[GameMap, Tuple[int, int]]:
+        """Return the next floor and the player's start position on it."""
+        self.prefetch()
+        if self._next_seed is not None:
+            seed, self._next_seed = self._next_seed, None
+            return self.generate(seed)
+        assert self._pending is not None
+        pending, self._pending = self._pending, None
+        return pending.result()
+
+    def close(self) -> None:
+        """Stop the worker thread, throwing away a floor that is still being generated."""
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -1,36 +1,60 @@
 #!/usr/bin/env python3
 #importing the necessary modules
+import os
+import random
+from typing import Optional, Tuple
+
 import tcod
 
+from camera import Camera
+
 from engine import Engine
 
 from entity import Entity
 
+from frame_timer import FrameTimer
+
+from game_map import GameMap
+
+from level_prefetch import LevelPrefetcher
+
 from input_handlers import EventHandler
 
 from procgen import generate_dungeon
 
-# main is the entry point of the program "-> None" indicates that there should be no return type
-def main() -> None:
-    
-    # defines the screen size.
-    screen_width = 80
-    screen_height = 50
+from replay import InputRecorder
 
-    # defines the map size 
-    map_width = 80
-    map_height = 50
+# defines the screen size.
+screen_width = 80
+screen_height = 50
 
-    # defines the room min and max size alone with max rooms 
-    room_max_size = 10
-    room_min_size = 6
-    max_rooms = 30
+# defines the map size. The map can be bigger than the screen, the camera follows the player and only draws the part of the map around them.
+map_width = 80
+map_height = 50
 
-    # defines and loadsthe tileset used for the game
-    tileset = tcod.tileset.load_tilesheet(
-        "dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD
+# defines the room min and max size alone with max rooms 
+room_max_size = 10
+room_min_size = 6
+max_rooms = 30
+
+
+# generate_floor generates one floor of the dungeon from a seed and returns it with the player's start position. It creates its own player entity for generate_dungeon to write the start position into, so it can run in the background (see level_prefetch.py) without moving the real player.
+def generate_floor(seed: int) -> Tuple[GameMap, Tuple[int, int]]:
+    start = Entity(0, 0, "@", (0, 255, 0))
+    game_map = generate_dungeon(
+        max_rooms=max_rooms,
+        room_min_size=room_min_size,
+        room_max_size=room_max_size,
+        map_width=map_width,
+        map_height=map_height,
+        player=start,
+        rng=seed,
     )
+    return game_map, (start.x, start.y)
 
+
+# new_engine sets up a new game: the player, the npc, the dungeon and the engine. It is separate from main so that a game can also be set up without a window, for example to replay a recorded session (see replay.py). The same seed always generates the same dungeon. With 'prefetch' off the next floor isn't generated in a background thread while the current one is played, but when the stairs are taken, which replay.py uses so that background work doesn't count against the turns it times. Either way the engine's prefetcher has to be closed when the game is over.
+def new_engine(seed: Optional[int] = None, timer: Optional[FrameTimer] = None, prefetch: bool = True) -> Engine:
     # creates an instance of the EventHandler class
     event_handler = EventHandler()
 
@@ -46,11 +70,40 @@ def main() -> None:
         room_max_size=room_max_size,
         map_width=map_width,
         map_height=map_height,
-        player=player
+        player=player,
+        rng=seed,
     )
-    
+
     # creates an instance of the Engine class and passes in the necessary parameters with are defined above
-    engine = Engine(entities=entities, event_handler=event_handler, game_map=game_map, player=player)
+    return Engine(
+        entities=entities,
+        event_handler=event_handler,
+        game_map=game_map,
+        player=player,
+        camera=Camera(screen_width, screen_height),
+        timer=timer,
+        prefetcher=LevelPrefetcher(generate_floor, seed, background=prefetch),
+    )
+
+
+# main is the entry point of the program "-> None" indicates that there should be no return type
+def main() -> None:
+
+    # defines and loadsthe tileset used for the game
+    tileset = tcod.tileset.load_tilesheet(
+        "dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD
+    )
+
+    # when the PRACRL_FRAME_TIMES environment variable is set to a file path, the time spent in each phase of every frame is recorded and written to that file as JSON when the game exits. Otherwise timing is off.
+    frame_times_path = os.environ.get("PRACRL_FRAME_TIMES")
+    timer = FrameTimer() if frame_times_path else None
+
+    # when the PRACRL_RECORD environment variable is set to a file path, the dungeon seed and every input event are recorded and written to that file when the game exits, so the session can be replayed with replay.py.
+    record_path = os.environ.get("PRACRL_RECORD")
+    seed = random.randrange(2**32)
+    recorder = InputRecorder(seed) if record_path else None
+
+    engine = new_engine(seed, timer=timer)
 
     # creates an instance of the tcod.context.new_terminal function and passes in the necessary parameters and assigns it to a variable called context. The code after "context:" will run as long as the context is open (which is the game window)
     with tcod.context.new_terminal(
@@ -62,15 +115,26 @@ def main() -> None:
     ) as context:
         # defines the console instance and passes in the necessary parameters. the console is what is displayed inside of the context window
         root_console = tcod.Console(screen_width, screen_height, order="F")
-        # while true, this loop will run the game and render and update the console
-        while True:
-            # Game Loop
-            engine.render(console=root_console, context=context)
-
-            # tcod.event.wait() waits for events to register then stores them as an object
-            events = tcod.event.wait()
-
-            engine.handle_events(events)
+        # while true, this loop will run the game and render and update the console. The game exits by raising SystemExit, the 'finally' block runs on the way out so the level prefetcher is stopped and the frame times are written no matter how the game ends.
+        try:
+            while True:
+                # Game Loop
+                engine.render(console=root_console, context=context)
+
+                # tcod.event.wait() waits for events to register then stores them as an object
+                events = tcod.event.wait()
+                if recorder is not None:
+                    events = recorder.record(events)
+
+                engine.handle_events(events)
+        finally:
+            if engine.prefetcher is not None:
+                engine.prefetcher.close()
+            if timer is not None and frame_times_path:
+                timer.end_frame()
+                timer.dump_json(frame_times_path)
+            if recorder is not None and record_path:
+                recorder.save(record_path)
 
 
 # this code ensures that the main function is run when the program is run and not when it is imported as a module
@@ -0,0 +1,223 @@
+# The map generators the game can choose from. Every generator takes the same arguments (the map size, the player, an optional seed or np.random.Generator and an optional chunk size) and returns a new GameMap, with the player placed on a floor tile, so they can be swapped for each other by name. Options specific to one generator are keyword-only arguments with defaults.
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+import tcod.bsp
+import tcod.random
+
+import tile_types
+from connectivity import label_regions
+from game_map import GameMap
+from procgen import RectangularRoom, RNGLike, generate_dungeon, tunnel_between
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+# The shared signature: generator(map_width, map_height, player, rng=None, chunk_size=None) -> GameMap
+MapGenerator = Callable[..., GameMap]
+
+# Every registered generator by name.
+GENERATORS: Dict[str, MapGenerator] = {}
+
+
+def register_generator(name: str) -> Callable[[MapGenerator], MapGenerator]:
+    """Decorator which registers a map generator under `name`."""
+
+    def register(generator: MapGenerator) -> MapGenerator:
+        if name in GENERATORS:
+            raise ValueError(f"A map generator named {name!r} is already registered.")
+        GENERATORS[name] = generator
+        return generator
+
+    return register
+
+
+def get_generator(name: str) -> MapGenerator:
+    """Return the map generator registered under `name`."""
+    try:
+        return GENERATORS[name]
+    except KeyError:
+        raise KeyError(f"Unknown map generator {name!r}, expected one of: {', '.join(GENERATORS)}.") from None
+
+
+# The original generator: random rooms joined by L-shaped tunnels.
+@register_generator("rooms")
+def generate_rooms(
+    map_width: int,
+    map_height: int,
+    player: Entity,
+    rng: RNGLike = None,
+    chunk_size: Optional[int] = None,
+    *,
+    max_rooms: int = 30,
+    room_min_size: int = 6,
+    room_max_size: int = 10,
+) -> GameMap:
+    """Generate rooms placed at random and joined by L-shaped tunnels."""
+    return generate_dungeon(
+        max_rooms=max_rooms,
+        room_min_size=room_min_size,
+        room_max_size=room_max_size,
+        map_width=map_width,
+        map_height=map_height,
+        player=player,
+        chunk_size=chunk_size,
+        rng=rng,
+    )
+
+
+# Binary space partitioning: the map is split in two over and over (tcod.bsp does the splitting), a room is dug in every leaf of the tree, and walking the tree from the bottom up, the two halves of every split are joined with a tunnel. Every room is reachable and rooms never overlap.
+@register_generator("bsp")
+def generate_bsp(
+    map_width: int,
+    map_height: int,
+    player: Entity,
+    rng: RNGLike = None,
+    chunk_size: Optional[int] = None,
+    *,
+    depth: int = 10,
+    min_size: int = 8,
+    room_min_size: int = 4,
+) -> GameMap:
+    """Generate rooms in the leaves of a BSP tree, joined along the tree."""
+    rng = np.random.default_rng(rng)
+    dungeon = GameMap(map_width, map_height, chunk_size=chunk_size)
+
+    bsp = tcod.bsp.BSP(x=0, y=0, width=map_width, height=map_height)
+    # tcod.bsp draws its split positions from a tcod random generator, which is seeded from rng so the same seed gives the same tree. split_recursive passes 'seed' straight to C, so it gets the generator's C pointer rather than the Random object.
+    bsp.split_recursive(
+        depth=depth,
+        min_width=min_size,
+        min_height=min_size,
+        max_horizontal_ratio=1.5,
+        max_vertical_ratio=1.5,
+        seed=tcod.random.Random(seed=int(rng.integers(2**31))).random_c,
+    )
+
+    # The point each node is joined to its sibling from: the center of a leaf's room, or for a split, the point of one of its two halves.
+    anchors: Dict[tcod.bsp.BSP, tuple] = {}
+    tunnels: List[np.ndarray] = []
+    for node in bsp.post_order():
+        if node.children:
+            first, second = node.children
+            tunnels.append(tunnel_between(anchors[first], anchors[second], rng))
+            anchors[node] = anchors[first] if rng.random() < 0.5 else anchors[second]
+            continue
+        # The room's walls stay inside the leaf, so rooms in neighbouring leaves never touch.
+        room_width = int(rng.integers(min(room_min_size, node.width - 1), node.width))
+        room_height = int(rng.integers(min(room_min_size, node.height - 1), node.height))
+        x = node.x + int(rng.integers(0, node.width - room_width))
+        y = node.y + int(rng.integers(0, node.height - room_height))
+        room = RectangularRoom(x, y, room_width, room_height)
+        dungeon.tiles[room.inner] = tile_types.floor
+        anchors[node] = room.center
+        if len(anchors) == 1:
+            # The first room, where the player starts.
+            player.place(*room.center)
+
+    if tunnels:
+        dungeon.tiles[tuple(np.concatenate(tunnels, axis=1))] = tile_types.floor
+    return dungeon
+
+
+# The number of walls among the 8 neighbours of every cell, with everything outside the map counted as wall. The map is padded by one cell and the 8 shifted copies of it are added together, so every cell is counted at once.
+def _wall_neighbors(walls: np.ndarray) -> np.ndarray:
+    width, height = walls.shape
+    padded = np.pad(walls, 1, constant_values=True).astype(np.uint8)
+    counts = np.zeros((width, height), dtype=np.uint8)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            if dx or dy:
+                counts += padded[1 + dx:1 + dx + width, 1 + dy:1 + dy + height]
+    return counts
+
+
+# Cellular automata caves: the map starts as random noise, and every step each cell becomes a wall if enough of its neighbours are walls (4 for a wall to stay a wall, 5 for a floor to become one). A few steps smooth the noise into open caves.
+@register_generator("cellular")
+def generate_cellular(
+    map_width: int,
+    map_height: int,
+    player: Entity,
+    rng: RNGLike = None,
+    chunk_size: Optional[int] = None,
+    *,
+    wall_chance: float = 0.45,
+    steps: int = 4,
+    connected: bool = True,
+) -> GameMap:
+    """Generate caves with a cellular automaton."""
+    rng = np.random.default_rng(rng)
+    dungeon = GameMap(map_width, map_height, chunk_size=chunk_size)
+
+    walls = rng.random((map_width, map_height)) < wall_chance
+    for _ in range(steps):
+        neighbors = _wall_neighbors(walls)
+        walls = np.where(walls, neighbors >= 4, neighbors >= 5)
+    # The edge of the map is always wall.
+    walls[[0, -1], :] = True
+    walls[:, [0, -1]] = True
+
+    # The noise leaves some pockets of cave cut off from the rest, so only the largest cave is kept (unless 'connected' is turned off).
+    if connected:
+        regions, sizes = label_regions(~walls)
+        if len(sizes) > 1:
+            walls = regions != int(np.argmax(sizes))
+
+    floors = np.argwhere(~walls)
+    if len(floors) == 0:
+        # Nothing survived, so at least dig out the cell the player stands on.
+        floors = np.array([[map_width // 2, map_height // 2]])
+        walls[map_width // 2, map_height // 2] = False
+    dungeon.tiles[~walls] = tile_types.floor
+    player.place(*(int(i) for i in floors[rng.integers(len(floors))]))
+    return dungeon
+
+
+# The 4 directions the drunkard can step in.
+_STEPS = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])
+
+
+# Drunkard walk: starting from the middle of the map, a walker takes random steps and digs out every cell it visits until enough of the map is floor. The steps are drawn batch_size at a time and turned into positions with a cumulative sum. A step which would leave the map (or touch its edge) is thrown away along with the rest of its batch, and the walk goes on from where it was.
+@register_generator("drunkard")
+def generate_drunkard(
+    map_width: int,
+    map_height: int,
+    player: Entity,
+    rng: RNGLike = None,
+    chunk_size: Optional[int] = None,
+    *,
+    floor_fraction: float = 0.4,
+    max_steps: Optional[int] = None,
+    batch_size: int = 4096,
+) -> GameMap:
+    """Generate a cave dug out by a random walk."""
+    rng = np.random.default_rng(rng)
+    dungeon = GameMap(map_width, map_height, chunk_size=chunk_size)
+
+    dug = np.zeros((map_width, map_height), dtype=bool)
+    x, y = map_width // 2, map_height // 2
+    dug[x, y] = True
+    floor_count = 1
+    target = floor_fraction * (map_width - 2) * (map_height - 2)
+    steps_left = 100 * map_width * map_height if max_steps is None else max_steps
+    while floor_count < target and steps_left > 0:
+        size = min(batch_size, steps_left)
+        path = np.cumsum(_STEPS[rng.integers(len(_STEPS), size=size)], axis=0) + (x, y)
+        inside = (path[:, 0] >= 1) & (path[:, 0] < map_width - 1) & (path[:, 1] >= 1) & (path[:, 1] < map_height - 1)
+        if not inside.all():
+            path = path[: int(np.argmin(inside))]
+        steps_left -= max(len(path), 1)
+        if len(path) == 0:
+            continue
+        # Only cells which weren't dug yet add to the floor count, and a cell visited twice in one batch only counts once.
+        cells = np.unique(path[:, 0] * map_height + path[:, 1])
+        floor_count += int(np.count_nonzero(~dug.reshape(-1)[cells]))
+        dug.reshape(-1)[cells] = True
+        x, y = (int(i) for i in path[-1])
+
+    dungeon.tiles[dug] = tile_types.floor
+    player.place(map_width // 2, map_height // 2)
+    return dungeon
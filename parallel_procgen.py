@@ -0,0 +1,95 @@
+# Generating many dungeons at once on every CPU core. generate_dungeon is pure Python, so threads can't run it in parallel (they would all wait on the GIL), which is why the work is spread across a pool of processes instead. Sending each finished map back to the parent process by pickling would copy it twice and spend time in pickle, so the workers write their maps straight into one block of shared memory that the parent process also has open. Only the small things (the map index and the player start position) go back through the pool.
+
+from __future__ import annotations
+
+# ProcessPoolExecutor runs functions in a pool of worker processes
+from concurrent.futures import ProcessPoolExecutor
+
+# SharedMemory is a block of memory that several processes can open by name
+from multiprocessing.shared_memory import SharedMemory
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+import tile_types
+from entity import Entity
+from procgen import generate_dungeon
+
+
+# Runs in a worker process. It opens the shared memory block, generates the dungeons for the given (index, seed) pairs and copies each map's tile IDs into its slot of the shared (N, width, height) array. The player start positions are returned to the parent, since they are what generate_dungeon would otherwise have written into the player entity.
+def _generate_into(
+    shm_name: str,
+    shape: Tuple[int, int, int],
+    jobs: Sequence[Tuple[int, int]],
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+) -> List[Tuple[int, int, int]]:
+    shm = SharedMemory(name=shm_name)
+    try:
+        maps = np.ndarray(shape, dtype=tile_types.tile_id_dt, buffer=shm.buf)
+        starts = []
+        for index, seed in jobs:
+            player = Entity(0, 0, "@", (255, 255, 255))
+            dungeon = generate_dungeon(
+                max_rooms=max_rooms,
+                room_min_size=room_min_size,
+                room_max_size=room_max_size,
+                map_width=shape[1],
+                map_height=shape[2],
+                player=player,
+                rng=seed,
+            )
+            maps[index] = dungeon.tile_ids
+            starts.append((index, player.x, player.y))
+        # The array is a view of the shared memory, it has to be let go of before the memory can be closed.
+        del maps
+        return starts
+    finally:
+        shm.close()
+
+
+def generate_dungeons(
+    seeds: Sequence[int],
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    map_width: int,
+    map_height: int,
+    workers: Optional[int] = None,
+    jobs_per_task: int = 8,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Generate one dungeon per seed across a pool of processes.
+
+    Returns the tile IDs of every map as an (N, map_width, map_height) array
+    and the player start positions as an (N, 2) array. Map `i` is the same
+    map `generate_dungeon(..., rng=seeds[i])` would generate.
+
+    `workers` defaults to the number of CPUs. Seeds are handed to the workers
+    `jobs_per_task` at a time to keep the pool overhead per map small.
+    """
+    count = len(seeds)
+    shape = (count, map_width, map_height)
+    starts = np.zeros((count, 2), dtype=np.int32)
+    if count == 0:
+        return np.zeros(shape, dtype=tile_types.tile_id_dt), starts
+
+    shm = SharedMemory(create=True, size=max(1, count * map_width * map_height * tile_types.tile_id_dt.itemsize))
+    try:
+        jobs = [(i, int(seed)) for i, seed in enumerate(seeds)]
+        tasks = [jobs[i:i + jobs_per_task] for i in range(0, count, jobs_per_task)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_generate_into, shm.name, shape, task, max_rooms, room_min_size, room_max_size)
+                for task in tasks
+            ]
+            for future in futures:
+                for index, x, y in future.result():
+                    starts[index] = x, y
+        # The maps are copied out of the shared memory in one go so the shared block can be freed straight away.
+        maps = np.ndarray(shape, dtype=tile_types.tile_id_dt, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    return maps, starts
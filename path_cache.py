@@ -0,0 +1,128 @@
+# Cached A* paths between two cells of a GameMap. Paths between the same points are asked for over and over (monsters walking between room centers, the way to the stairs), so every path tcod.path.AStar finds is kept and handed back without searching again. A tile write doesn't throw every path away: the GameMap tells the cache which cells of the walkable mask the write changed, and only the paths those cells could affect are dropped. A path is dropped when one of its cells stops being walkable, or when a cell which became walkable is close enough to its ends that a path through it could be shorter.
+#
+# The search itself only looks at a window of the map around the two ends, so a path on a 10k x 10k chunked map costs about as much as on a small one instead of copying the whole walkable mask. A path of length L which leaves the window has to go at least (margin + 1) cells past the rectangle around its ends and come back, so it is at least D + 2 * (margin + 1) long, where D is the Manhattan distance between the ends. A path found inside the window which is shorter than that is as short as any on the whole map. Otherwise the window grows and the search runs again.
+
+from __future__ import annotations
+
+from typing import Dict, List, Set, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+import tcod.path
+
+from versioned_cache import VersionedCache
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+# A cached path is keyed by its (start, goal) cells.
+PathKey = Tuple[Tuple[int, int], Tuple[int, int]]
+
+# How far past the rectangle around the ends the first search window reaches, and how much the margin is multiplied by every time the window is too small.
+WINDOW_MARGIN = 16
+WINDOW_GROWTH = 4
+
+
+class PathCache(VersionedCache[PathKey, Tuple[Tuple[int, int], ...]]):
+    """Memoized A* paths for one GameMap.
+
+    `path` returns the cells walked through from `start` to `goal` (not
+    including `start`), or an empty list when `goal` can't be reached.
+    Moves are the four cardinal directions, like the player's. At most
+    `max_size` paths are kept, dropping the least recently used one.
+    """
+
+    def __init__(self, game_map: GameMap, max_size: int = 256):
+        # No version to check on every lookup: walkable_changed keeps the paths in step with the map.
+        super().__init__(max_size)
+        self.game_map = game_map
+        # Every cell of every cached path (the start included) maps to the paths that go through it, so the paths a blocked cell cuts are found without looking through all of them.
+        self._users: Dict[Tuple[int, int], Set[PathKey]] = {}
+        # The number of cached paths a tile write made the cache drop.
+        self.invalidated = 0
+
+    def path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Return the path from `start` to `goal` on the map as it is now."""
+        key = ((int(start[0]), int(start[1])), (int(goal[0]), int(goal[1])))
+        found = self.lookup(key)
+        if found is None:
+            found = self._search(*key)
+            for cell in (key[0],) + found:
+                self._users.setdefault(cell, set()).add(key)
+            self.store(key, found)
+        # A new list every time, so the caller can pop steps off it without changing the cached path.
+        return list(found)
+
+    def _search(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Tuple[Tuple[int, int], ...]:
+        walkable = self.game_map.walkable
+        if start == goal or not (walkable[start] and walkable[goal]):
+            return ()
+        width, height = self.game_map.width, self.game_map.height
+        distance = abs(start[0] - goal[0]) + abs(start[1] - goal[1])
+        margin = WINDOW_MARGIN
+        while True:
+            x0, x1 = max(0, min(start[0], goal[0]) - margin), min(width, max(start[0], goal[0]) + margin + 1)
+            y0, y1 = max(0, min(start[1], goal[1]) - margin), min(height, max(start[1], goal[1]) + margin + 1)
+            whole_map = x0 == 0 and y0 == 0 and x1 == width and y1 == height
+            cost = np.asarray(walkable[x0:x1, y0:y1]).astype(np.int8)
+            steps = tcod.path.AStar(cost, diagonal=0).get_path(start[0] - x0, start[1] - y0, goal[0] - x0, goal[1] - y0)
+            if whole_map or (steps and len(steps) < distance + 2 * (margin + 1)):
+                return tuple((x + x0, y + y0) for x, y in steps)
+            # Before the window grows any further, the cached region labels tell whether the goal can be reached at all, which saves searching ever bigger windows for a path that isn't there.
+            if not steps and not self.game_map.is_reachable(start, goal):
+                return ()
+            margin *= WINDOW_GROWTH
+
+    def _evicted(self, key: PathKey, found: Tuple[Tuple[int, int], ...]) -> None:
+        for cell in (key[0],) + found:
+            users = self._users[cell]
+            users.discard(key)
+            if not users:
+                del self._users[cell]
+
+    def _drop(self, key: PathKey) -> None:
+        self._evicted(key, self.discard(key))
+
+    # Called by the GameMap after every tile write which changed the walkable mask, with the cells which changed. The mask already holds their new values.
+    def walkable_changed(self, xs: np.ndarray, ys: np.ndarray) -> None:
+        """Drop the cached paths the changed cells could affect."""
+        if not len(self):
+            return
+        opened = np.asarray(self.game_map.walkable[xs, ys], dtype=bool)
+
+        # Paths through a cell which is now blocked can't be walked any more.
+        blocked = set(zip(xs[~opened].tolist(), ys[~opened].tolist()))
+        cut: Set[PathKey] = set()
+        for cell in blocked.intersection(self._users):
+            cut |= self._users[cell]
+        for path_key in cut:
+            self._drop(path_key)
+        self.invalidated += len(cut)
+
+        # A path through a newly opened cell c is at least |start - c| + |c - goal| moves long (the Manhattan distance, since moves are cardinal). A cached path which is already that short can't be beaten, everything else is dropped. Paths which didn't reach their goal are always dropped. The bound is taken over the rectangle around the opened cells, which is never more than the bound of any cell inside it.
+        if not opened.any() or not len(self):
+            return
+        ox0, ox1 = int(xs[opened].min()), int(xs[opened].max())
+        oy0, oy1 = int(ys[opened].min()), int(ys[opened].max())
+        keys = list(self)
+        ends = np.array(keys).reshape(-1, 4)
+        sx, sy, gx, gy = ends.T
+        bound = (
+            np.maximum(0, np.maximum(ox0 - sx, sx - ox1)) + np.maximum(0, np.maximum(oy0 - sy, sy - oy1))
+            + np.maximum(0, np.maximum(ox0 - gx, gx - ox1)) + np.maximum(0, np.maximum(oy0 - gy, gy - oy1))
+        )
+        paths = [self._entries[k] for k in keys]
+        lengths = np.array([len(p) if p or k[0] == k[1] else np.inf for k, p in zip(keys, paths)])
+        stale = np.flatnonzero(bound < lengths)
+        for i in stale:
+            self._drop(keys[i])
+        self.invalidated += len(stale)
+
+    def invalidate(self) -> None:
+        """Drop every cached path, keeping the counters."""
+        super().invalidate()
+        self._users.clear()
+
+    def clear(self) -> None:
+        """Drop every cached path and reset the counters."""
+        super().clear()
+        self.invalidated = 0
@@ -1,11 +1,11 @@
 # this line allows for the future resolution of type hints, which is a fancy way of saying that it allows for the use of type hints before the actual definition of the type.
 from __future__ import annotations
 
-# this line imports the random module, which is used to generate random numbers.
-import random
+# this line imports numpy, whose random number generators (np.random.Generator) are used to generate random numbers. Every call to generate_dungeon gets its own generator instead of sharing the global one in the random module, so the same seed always gives the same map, even when other code uses random numbers at the same time or several dungeons are generated in parallel.
+import numpy as np  # type: ignore
 
-# this imports the Iterator, List, Tuple and TYPE_CHECKING. Iterator is a type hint used to indicate that an object is an iterator which can be iterated over using a loop or other iteration mechanism. It represents a sequence of values that can be accessed one by one. List if a generic type hint used to indicate a list, which is an ordered collection of items. It represents a mutable sequence. Tuple is a generic type hint used to indicate a tuple which is an ordered collection of elements. It represents an immutable sequence. TYPE_CHECKING is a special constant used to indicate that a type hint should be resolved as if the code was being run by the type checker rather than the interpreter. This is used to avoid circular imports. For example, if module A imports module B and module B imports module A, then the interpreter will fail to import either module. However, if module A imports module B and module B imports module A but only uses type hints from module A, then the interpreter will be able to import both modules.
-from typing import Iterator, List, Tuple, TYPE_CHECKING
+# this imports the List, Tuple and TYPE_CHECKING. List if a generic type hint used to indicate a list, which is an ordered collection of items. It represents a mutable sequence. Tuple is a generic type hint used to indicate a tuple which is an ordered collection of elements. It represents an immutable sequence. TYPE_CHECKING is a special constant used to indicate that a type hint should be resolved as if the code was being run by the type checker rather than the interpreter. This is used to avoid circular imports. For example, if module A imports module B and module B imports module A, then the interpreter will fail to import either module. However, if module A imports module B and module B imports module A but only uses type hints from module A, then the interpreter will be able to import both modules.
+from typing import List, Optional, Tuple, TYPE_CHECKING, Union
 
 # import tcod
 import tcod
@@ -13,6 +13,9 @@ import tcod
 # import GameMap from game_map.py
 from game_map import GameMap
 
+# import ChunkedArray, used for the occupancy grid of chunked maps
+from chunked_array import ChunkedArray
+
 # import tile_types.py
 # Once imported, you can access the names defined in tile_types.py using the syntax tile_types.name, where name is the specific name defined in the module. For example, if tile_types.py defines a variable floor, you can access it as tile_types.floor
 import tile_types
@@ -21,6 +24,9 @@ import tile_types
 if TYPE_CHECKING:
     from entity import Entity
 
+# Anything that can be used as the source of random numbers for map generation: a seed (the same seed always generates the same map), an existing np.random.Generator (which is used as is, so several calls can share one), or None for a random map.
+RNGLike = Union[int, np.random.Generator, None]
+
 # defining variables with self creates an instance variable unique to each instance object, so each instance will have their own indivudual copy of the variable.
 class RectangularRoom:
     def __init__(self, x: int, y: int, width: int, height: int):
@@ -62,24 +68,58 @@ class RectangularRoom:
             and self.y2 >= other.y1
         )
     
+# tunnel_between returns the tunnel as a (2, N) numpy array, the first row holds the x coordinates and the second row the y coordinates. 'tiles[tuple(tunnel)]' then digs the whole tunnel with one fancy-indexed assignment instead of one assignment per cell. The corner cell is in both legs of the tunnel, which doesn't matter since digging it twice has the same result.
 def tunnel_between(
-    start: Tuple[int, int], end: Tuple[int, int]
-) -> Iterator[Tuple[int, int]]:
-    """Return an L-shaped tunnel between these two points."""
+    start: Tuple[int, int], end: Tuple[int, int], rng: np.random.Generator
+) -> np.ndarray:
+    """Return an L-shaped tunnel between these two points as a (2, N) array of coordinates."""
     x1, y1 = start
     x2, y2 = end
-    if random.random() < 0.5:  # 50% chance.
+    if rng.random() < 0.5:  # 50% chance.
         # Move horizontally, then vertically.
         corner_x, corner_y = x2, y1
     else:
         # Move vertically, then horizontally.
         corner_x, corner_y = x1, y2
 
-    # Generate the coordinates for this tunnel.
-    for x, y in tcod.los.bresenham((x1, y1), (corner_x, corner_y)).tolist():
-        yield x, y
-    for x, y in tcod.los.bresenham((corner_x, corner_y), (x2, y2)).tolist():
-        yield x, y
+    # Generate the coordinates for this tunnel. tcod.los.bresenham returns an (N, 2) array of points, the two legs are joined and transposed into (2, N).
+    return np.concatenate(
+        [
+            tcod.los.bresenham((x1, y1), (corner_x, corner_y)),
+            tcod.los.bresenham((corner_x, corner_y), (x2, y2)),
+        ]
+    ).T
+
+
+# The most tunnel cells TunnelBatch holds before digging them. Digging every tunnel in one write would hold the coordinates of every corridor of the map at once (and numpy and ChunkedArray copy them again while writing), which on a very large map takes far more memory than the map itself. Batches of this size keep that bounded while still digging thousands of cells per write.
+TUNNEL_BATCH_CELLS = 1 << 16
+
+
+class TunnelBatch:
+    """Collects tunnels and digs them into a map a batch at a time.
+
+    Call `flush` after the last tunnel has been added to dig what is left.
+    """
+
+    def __init__(self, dungeon: GameMap, max_cells: int = TUNNEL_BATCH_CELLS):
+        self.dungeon = dungeon
+        self.max_cells = max_cells
+        self._tunnels: List[np.ndarray] = []
+        self._cells = 0
+
+    def add(self, tunnel: np.ndarray) -> None:
+        """Plan a (2, N) tunnel, digging the batch once it holds `max_cells` cells."""
+        self._tunnels.append(tunnel)
+        self._cells += tunnel.shape[1]
+        if self._cells >= self.max_cells:
+            self.flush()
+
+    def flush(self) -> None:
+        """Dig every tunnel planned so far with a single fancy-indexed assignment."""
+        if self._tunnels:
+            self.dungeon.tiles[tuple(np.concatenate(self._tunnels, axis=1))] = tile_types.floor
+            self._tunnels.clear()
+            self._cells = 0
     
 def generate_dungeon(
     max_rooms: int,
@@ -88,39 +128,65 @@ def generate_dungeon(
     map_width: int,
     map_height: int,
     player: Entity,
+    chunk_size: Optional[int] = None,
+    rng: RNGLike = None,
 ) -> GameMap:
-    """Generate a new dungeon map."""
-    dungeon = GameMap(map_width, map_height)
+    """Generate a new dungeon map.
+
+    `rng` is a seed or an `np.random.Generator`; the same seed always
+    generates the same map. Passing `chunk_size` builds the map on the
+    chunked backend, which only allocates the parts of the map that rooms
+    and tunnels are dug into.
+    """
+    # np.random.default_rng turns a seed (or None) into a new generator, and returns a generator that is passed in unchanged.
+    rng = np.random.default_rng(rng)
+
+    dungeon = GameMap(map_width, map_height, chunk_size=chunk_size)
 
     rooms: List[RectangularRoom] = []
 
+    # The occupancy grid marks every cell covered by a room that has been placed, including its walls. Checking a new room is then a single '.any()' over the cells it would cover, no matter how many rooms there already are, instead of calling RectangularRoom.intersects against every room. Rooms are marked from (x1, y1) to (x2, y2) inclusive, which is exactly the overlap that intersects tests for. Chunked maps get a chunked grid so it doesn't allocate the empty parts of the map either.
+    occupied: Union[np.ndarray, ChunkedArray]
+    if chunk_size is None:
+        occupied = np.zeros((map_width, map_height), dtype=bool, order="F")
+    else:
+        occupied = ChunkedArray((map_width, map_height), bool, False, chunk_size)
+
+    # The tunnels are collected here and dug a batch at a time. Every tunnel only turns walls into floor and rooms are placed by the occupancy grid, not the tiles, so the order the cells are dug in doesn't change the result.
+    tunnels = TunnelBatch(dungeon)
+
     for r in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        # rng.integers excludes its upper bound, unlike random.randint, hence the + 1.
+        room_width = int(rng.integers(room_min_size, room_max_size + 1))
+        room_height = int(rng.integers(room_min_size, room_max_size + 1))
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = int(rng.integers(0, dungeon.width - room_width))
+        y = int(rng.integers(0, dungeon.height - room_height))
 
         # "RectangularRoom" class makes rectangles easier to work with
         new_room = RectangularRoom(x, y, room_width, room_height)
 
-        # Run through the other rooms and see if they intersect with this one.
-        if any(new_room.intersects(other_room) for other_room in rooms):
+        # Check the occupancy grid to see if this room would intersect any of the other rooms.
+        footprint = slice(new_room.x1, new_room.x2 + 1), slice(new_room.y1, new_room.y2 + 1)
+        if occupied[footprint].any():
             continue  # This room intersects, so go to the next attempt.
         # If there are no intersections then the room is valid.
+        occupied[footprint] = True
 
         # Dig out this rooms inner area.
         dungeon.tiles[new_room.inner] = tile_types.floor
 
         if len(rooms) == 0:
             # The first room, where the player starts.
-            player.x, player.y = new_room.center
+            player.place(*new_room.center)
         else:  # All rooms after the first.
-            # Dig out a tunnel between this room and the previous one.
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.floor
+            # Plan a tunnel between this room and the previous one.
+            tunnels.add(tunnel_between(rooms[-1].center, new_room.center, rng))
 
         # Finally, append the new room to the list.
         rooms.append(new_room)
 
+    # Dig out the tunnels of the last batch.
+    tunnels.flush()
+
     return dungeon
\ No newline at end of file
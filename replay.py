@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# Recording and replaying play sessions. A recording is the dungeon seed plus every input event the game handled, stored in a small binary file. Replaying it sets up a new game from the same seed and feeds the same events to the engine with no window and no waiting for input, so the session plays out exactly the same way, as fast as the engine can go. That makes recordings usable as throughput benchmarks (turns per second) and as regression tests.
+
+# this line allows for the future resolution of type hints
+from __future__ import annotations
+
+# argparse reads the command line arguments when this file is run as a script
+import argparse
+
+# struct packs and unpacks the binary records
+import struct
+
+# time.perf_counter is used to time replays
+import time
+
+# importing the type hints used in this module from the typing module
+from typing import Any, Iterable, List, NamedTuple, Optional, TYPE_CHECKING
+
+import tcod.event
+from tcod.console import Console
+
+from headless import ScriptedEventSource, run_headless
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+# The file starts with a header: a 4 byte magic string, a format version, the dungeon seed and the number of events. It is followed by one fixed size record per event: the event type, the key symbol and the key modifiers.
+MAGIC = b"PRRL"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBQI")
+RECORD = struct.Struct("<BiH")
+
+# The event types that are recorded. Only events the EventHandler reacts to are recorded, everything else (like mouse motion) doesn't change the game and is dropped.
+EVENT_KEYDOWN = 1
+EVENT_QUIT = 2
+
+
+class Recording(NamedTuple):
+    """A recorded session: the seed the dungeon was generated from and the input events."""
+
+    seed: int
+    events: List[Any]
+
+
+# InputRecorder sits between tcod.event.wait() and Engine.handle_events in the game loop. It passes the events through unchanged while keeping a compact copy of the ones that matter.
+class InputRecorder:
+    """Records the input events of a session started from `seed`."""
+
+    def __init__(self, seed: int):
+        self.seed = seed
+        self._records = bytearray()
+        self.count = 0
+
+    def record(self, events: Iterable[Any]) -> List[Any]:
+        """Record a batch of events and return them so they can still be handled."""
+        events = list(events)
+        for event in events:
+            if isinstance(event, tcod.event.KeyDown):
+                self._records += RECORD.pack(EVENT_KEYDOWN, event.sym, event.mod)
+            elif isinstance(event, tcod.event.Quit):
+                self._records += RECORD.pack(EVENT_QUIT, 0, 0)
+            else:
+                continue
+            self.count += 1
+        return events
+
+    def to_bytes(self) -> bytes:
+        return HEADER.pack(MAGIC, FORMAT_VERSION, self.seed, self.count) + bytes(self._records)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+
+def decode(data: bytes) -> Recording:
+    """Turn the bytes written by InputRecorder back into a Recording."""
+    magic, version, seed, count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a pracrl recording.")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported recording version {version}.")
+    events: List[Any] = []
+    for event_type, sym, mod in RECORD.iter_unpack(data[HEADER.size:HEADER.size + count * RECORD.size]):
+        if event_type == EVENT_KEYDOWN:
+            events.append(tcod.event.KeyDown(scancode=0, sym=sym, mod=mod))
+        elif event_type == EVENT_QUIT:
+            events.append(tcod.event.Quit())
+    return Recording(seed, events)
+
+
+def load(path: str) -> Recording:
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+# Plays a recording on an engine that was set up from the recording's seed. Events are handled one per frame, just like they were when they were recorded. With a console every frame is also rendered into it (offscreen), without one rendering is skipped. Returns the number of frames (turns) played.
+def play(engine: Engine, recording: Recording, console: Optional[Console] = None) -> int:
+    """Replay a recording on `engine` and return the number of turns played."""
+    return run_headless(engine, ScriptedEventSource(recording.events), console)
+
+
+# The argparse type for --repeat. With no replays there would be nothing to time or report, so anything below 1 is refused with a usage error.
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def main() -> None:
+    # main.py imports this module for the recorder, so it is only imported here when a replay is run from the command line.
+    from main import new_engine, screen_height, screen_width
+
+    parser = argparse.ArgumentParser(description="Replay a recorded session at full speed and report turns per second.")
+    parser.add_argument("path", help="a recording made with PRACRL_RECORD=path")
+    parser.add_argument("--render", action="store_true", help="also render every turn into an offscreen console")
+    parser.add_argument("--repeat", type=positive_int, default=5, help="number of times to replay (default: 5)")
+    args = parser.parse_args()
+
+    recording = load(args.path)
+    best = float("inf")
+    for _ in range(args.repeat):
+        # Without background prefetching, so a floor being generated in another thread doesn't slow down the turns being timed. A floor is still generated when the recording takes the stairs.
+        engine = new_engine(recording.seed, prefetch=False)
+        console = Console(screen_width, screen_height, order="F") if args.render else None
+        start = time.perf_counter()
+        try:
+            turns = play(engine, recording, console)
+        finally:
+            if engine.prefetcher is not None:
+                engine.prefetcher.close()
+        best = min(best, time.perf_counter() - start)
+    print(f"seed={recording.seed} events={len(recording.events)} turns={turns}")
+    print(f"final player position: {engine.player.x}, {engine.player.y}")
+    print(f"best of {args.repeat}: {turns / best:.0f} turns per second")
+
+
+if __name__ == "__main__":
+    main()
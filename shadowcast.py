@@ -0,0 +1,118 @@
+# Symmetric shadowcasting field of view in pure numpy, for batch simulations which step many maps at once. It computes the same cells as tcod.map.compute_fov with FOV_SYMMETRIC_SHADOWCAST (and light_walls on) for a whole batch of maps and viewers in one call, and loops in Python once per row of distance from the viewers, never once per cell or per viewer.
+#
+# How it works: shadowcasting looks at the map in 4 quadrants around the viewer. In a quadrant, row 'depth' holds the cells 'col' = -depth..depth, and the lines leaving the viewer are measured by their slope col / depth. What can still be seen at a row is a list of lit intervals of slopes, starting with [-1, 1]. Every cell an interval reaches is scanned: walls are visible, floors are visible when their center is inside the interval, and each run of floor cells passes a narrower interval on to the next row. Here the intervals of every quadrant of every viewer are kept in flat arrays (the "frontier"), and each row expands all of them into their cells, looks the cells up in the maps and cuts out the intervals of the next row with a few whole-array operations.
+#
+# The slopes are float32 numbers, worked out with the same float32 operations in the same order as libtcod's fov_symmetric_shadowcast.c, including the way it rounds a slope which lands exactly between two cells. That is what makes the results match tcod cell for cell, rounding errors and all.
+
+from __future__ import annotations
+
+import numpy as np  # type: ignore
+
+# The cell at (depth, col) of quadrant q is at origin + depth * _DEPTH_AXIS[q] + col * _COL_AXIS[q], in (x, y) array indices. This is libtcod's quadrant table, with its x and y swapped since tcod indexes arrays the other way around.
+_DEPTH_AXIS = np.array([(0, 1), (1, 0), (-1, 0), (0, -1)])
+_COL_AXIS = np.array([(1, 0), (0, 1), (0, -1), (-1, 0)])
+
+# libtcod rounds d * slope to a column after scaling it by one of these, so a slope exactly between two cells reaches one cell further at the low end of an interval and one cell less far at the high end.
+_ROUND_UP = np.float32(1 + np.finfo(np.float32).eps)
+_ROUND_DOWN = np.float32(1 - np.finfo(np.float32).eps)
+
+
+def _round(n: np.ndarray) -> np.ndarray:
+    """Round float32 numbers half away from zero, like C's roundf."""
+    n = n.astype(np.float64)  # Exact, and n + 0.5 can't round in float64.
+    return (np.sign(n) * np.floor(np.abs(n) + 0.5)).astype(np.intp)
+
+
+def _slope(depth: int, col: np.ndarray) -> np.ndarray:
+    """The float32 slope of the low edge of cells `col` at `depth`."""
+    return (np.float32(2) * col.astype(np.float32) - np.float32(1)) / np.float32(2 * depth)
+
+
+def shadowcast_batch(transparent: np.ndarray, origins: np.ndarray, radius: int = 0) -> np.ndarray:
+    """Compute symmetric shadowcasting FOV for a batch of viewers.
+
+    `transparent` is a (B, width, height) stack of transparency masks, one
+    per viewer, or a single (width, height) mask shared by every viewer.
+    `origins` is a (B, 2) array of viewer positions. Returns a
+    (B, width, height) boolean stack of the visible cells, the same cells
+    `tcod.map.compute_fov(..., radius, True, FOV_SYMMETRIC_SHADOWCAST)` gives.
+    A radius of 0 means there is no limit to how far can be seen.
+    """
+    transparent = np.asarray(transparent, dtype=bool)
+    origins = np.asarray(origins, dtype=np.intp).reshape(-1, 2)
+    count = len(origins)
+    width, height = transparent.shape[-2:]
+    # The map each viewer looks at: its own, or the shared one.
+    if transparent.ndim == 2:
+        transparent = transparent[np.newaxis]
+        map_index = np.zeros(count, dtype=np.intp)
+    else:
+        map_index = np.arange(count)
+
+    visible = np.zeros((count, width, height), dtype=bool)
+    visible[np.arange(count), origins[:, 0], origins[:, 1]] = True
+
+    # The frontier: one entry per lit interval, with the viewer and quadrant it belongs to. Every quadrant starts out lit from -1 to 1.
+    viewer = np.repeat(np.arange(count), 4)
+    quadrant = np.tile(np.arange(4), count)
+    low = np.full(4 * count, -1, dtype=np.float32)
+    high = np.full(4 * count, 1, dtype=np.float32)
+    radius_squared = radius * radius
+
+    depth = 0
+    while len(viewer):
+        depth += 1
+        # Nothing at this depth or further is inside the radius.
+        if radius > 0 and depth >= radius:
+            break
+        # libtcod stops scanning a quadrant at the first row which is off the map.
+        row_x = origins[viewer, 0] + depth * _DEPTH_AXIS[quadrant, 0]
+        row_y = origins[viewer, 1] + depth * _DEPTH_AXIS[quadrant, 1]
+        keep = (row_x >= 0) & (row_x < width) & (row_y >= 0) & (row_y < height)
+        viewer, quadrant, low, high = viewer[keep], quadrant[keep], low[keep], high[keep]
+        row_x, row_y = row_x[keep], row_y[keep]
+
+        # The columns each interval reaches. An interval can reach no column at all when it has shrunk to a single slope, and then it is passed on to the next row as it is.
+        scaled_low = np.float32(depth) * low
+        scaled_high = np.float32(depth) * high
+        first = _round(scaled_low * _ROUND_UP)
+        widths = np.maximum(_round(scaled_high * _ROUND_DOWN) - first + 1, 0)
+        empty = widths == 0
+
+        # Every cell of every interval, one after another: 'owner' is the interval a cell belongs to and 'start' is where each interval's cells begin.
+        start = np.cumsum(widths) - widths
+        owner = np.repeat(np.arange(len(widths)), widths)
+        col = first[owner] + np.arange(len(owner)) - start[owner]
+        cell_quadrant = quadrant[owner]
+        x = row_x[owner] + col * _COL_AXIS[cell_quadrant, 0]
+        y = row_y[owner] + col * _COL_AXIS[cell_quadrant, 1]
+        on_map = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+        x, y = np.where(on_map, x, 0), np.where(on_map, y, 0)
+        # Cells off the map are treated as walls, which never changes what is visible on the map, and are never visible themselves.
+        floor = transparent[map_index[viewer[owner]], x, y] & on_map
+
+        # Walls are visible when reached, floors when their center is inside the interval, and only inside the radius.
+        col_float = col.astype(np.float32)
+        seen = on_map & (~floor | ((col_float >= scaled_low[owner]) & (col_float <= scaled_high[owner])))
+        if radius > 0:
+            seen &= col * col + depth * depth < radius_squared
+        visible[viewer[owner[seen]], x[seen], y[seen]] = True
+
+        # Each run of floor cells passes an interval on to the next row. It starts at the low edge of its first cell, or where its interval starts if that is the interval's first cell, and ends at the low edge of the wall after it, or where its interval ends.
+        first_cell = np.zeros(len(owner), dtype=bool)
+        first_cell[start[~empty]] = True
+        last_cell = np.zeros(len(owner), dtype=bool)
+        last_cell[(start + widths - 1)[~empty]] = True
+        run_start = floor & (first_cell | ~np.roll(floor, 1))
+        run_end = floor & (last_cell | ~np.roll(floor, -1))
+        starts, ends = np.flatnonzero(run_start), np.flatnonzero(run_end)
+        run_owner = owner[starts]
+        run_low = np.where(first_cell[starts], low[run_owner], _slope(depth, col[starts]))
+        run_high = np.where(last_cell[ends], high[run_owner], _slope(depth, col[np.minimum(ends + 1, len(col) - 1)]))
+
+        viewer = np.concatenate([viewer[run_owner], viewer[empty]])
+        quadrant = np.concatenate([quadrant[run_owner], quadrant[empty]])
+        low = np.concatenate([run_low, low[empty]])
+        high = np.concatenate([run_high, high[empty]])
+
+    return visible
@@ -0,0 +1,113 @@
+# this line allows for the future resolution of type hints, which lets the Entity type hint below be used without importing the entity module at runtime (entity.py imports this module, so importing it back would be circular).
+from __future__ import annotations
+
+# importing the type hints used in this module from the typing module
+from typing import TYPE_CHECKING, Dict, Iterator, List, Set, Tuple
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+# The default width and height (in cells) of a bucket. A rectangle or radius query only looks at the buckets it overlaps, so buckets around the size of a typical query keep the number of buckets visited small without putting too many entities in each one.
+DEFAULT_BUCKET_SIZE = 8
+
+
+class SpatialIndex:
+    """A uniform grid of buckets for looking entities up by position.
+
+    Entities are added with `add`, and keep the index up to date themselves
+    through `Entity.move` and `Entity.place`.
+    """
+
+    def __init__(self, bucket_size: int = DEFAULT_BUCKET_SIZE):
+        if bucket_size <= 0:
+            raise ValueError(f"bucket_size must be positive, got {bucket_size}.")
+        self.bucket_size = bucket_size
+        # The entities on each occupied cell, so 'what is at (x, y)' is a single dictionary lookup.
+        self._cells: Dict[Tuple[int, int], List[Entity]] = {}
+        # The entities in each occupied bucket. Only buckets that contain something are stored, so the index costs nothing for empty parts of the map and works for maps of any size.
+        self._buckets: Dict[Tuple[int, int], Set[Entity]] = {}
+        # The position each entity was indexed at. This is needed to find an entity's old cell and bucket after its x and y have already changed.
+        self._positions: Dict[Entity, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, entity: object) -> bool:
+        return entity in self._positions
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self._positions)
+
+    def add(self, entity: Entity) -> None:
+        """Add an entity at its current position."""
+        if entity in self._positions:
+            return
+        self._insert(entity, entity.x, entity.y)
+        entity.spatial_index = self
+
+    def remove(self, entity: Entity) -> None:
+        """Remove an entity from the index."""
+        x, y = self._positions[entity]
+        self._delete(entity, x, y)
+        entity.spatial_index = None
+
+    # Called by the Entity after its x or y changed. The old position is looked up from self._positions so the entity can be taken out of its old cell and bucket.
+    def update(self, entity: Entity) -> None:
+        """Move an entity to its current position in the index."""
+        old = self._positions[entity]
+        if old == (entity.x, entity.y):
+            return
+        self._delete(entity, *old)
+        self._insert(entity, entity.x, entity.y)
+
+    def at(self, x: int, y: int) -> List[Entity]:
+        """Return the entities at (x, y)."""
+        return list(self._cells.get((x, y), ()))
+
+    def in_rect(self, x0: int, y0: int, x1: int, y1: int) -> List[Entity]:
+        """Return the entities with x0 <= x < x1 and y0 <= y < y1."""
+        found: List[Entity] = []
+        if x1 <= x0 or y1 <= y0:
+            return found
+        size = self.bucket_size
+        for bx in range(x0 // size, (x1 - 1) // size + 1):
+            for by in range(y0 // size, (y1 - 1) // size + 1):
+                bucket = self._buckets.get((bx, by))
+                if not bucket:
+                    continue
+                # Buckets fully inside the rectangle don't need their entities checked one by one.
+                if x0 <= bx * size and (bx + 1) * size <= x1 and y0 <= by * size and (by + 1) * size <= y1:
+                    found.extend(bucket)
+                    continue
+                for entity in bucket:
+                    x, y = self._positions[entity]
+                    if x0 <= x < x1 and y0 <= y < y1:
+                        found.append(entity)
+        return found
+
+    def in_radius(self, x: int, y: int, radius: float) -> List[Entity]:
+        """Return the entities within a straight line distance of `radius` from (x, y)."""
+        r = int(radius)
+        radius_squared = radius * radius
+        return [
+            entity
+            for entity in self.in_rect(x - r, y - r, x + r + 1, y + r + 1)
+            if (self._positions[entity][0] - x) ** 2 + (self._positions[entity][1] - y) ** 2 <= radius_squared
+        ]
+
+    def _insert(self, entity: Entity, x: int, y: int) -> None:
+        self._positions[entity] = (x, y)
+        self._cells.setdefault((x, y), []).append(entity)
+        self._buckets.setdefault((x // self.bucket_size, y // self.bucket_size), set()).add(entity)
+
+    def _delete(self, entity: Entity, x: int, y: int) -> None:
+        del self._positions[entity]
+        cell = self._cells[x, y]
+        cell.remove(entity)
+        if not cell:
+            del self._cells[x, y]
+        key = (x // self.bucket_size, y // self.bucket_size)
+        bucket = self._buckets[key]
+        bucket.discard(entity)
+        if not bucket:
+            del self._buckets[key]
@@ -0,0 +1,77 @@
+# Tests for batch_procgen: every map of a batch must be one connected region of floor holding its start, its rooms must never overlap, the difference-array carving must dig exactly the rectangles it is given, and a wrong 'out' array must be refused.
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np  # type: ignore
+import pytest
+
+import batch_procgen
+import tile_types
+from batch_procgen import generate_dungeon_batch
+from connectivity import label_regions
+
+SETTINGS = dict(max_rooms=30, room_min_size=6, room_max_size=10, map_width=80, map_height=50)
+
+
+def test_maps_are_connected_around_their_start() -> None:
+    maps, starts = generate_dungeon_batch(20, rng=0, **SETTINGS)
+    assert maps.shape == (20, 80, 50) and maps.dtype == tile_types.tile_id_dt
+    for tiles, (x, y) in zip(maps, starts):
+        assert set(np.unique(tiles).tolist()) <= {tile_types.floor_id, tile_types.wall_id}
+        regions, sizes = label_regions(tile_types.walkable_lut[tiles])
+        assert len(sizes) == 1
+        assert regions[x, y] == 0
+
+
+def test_rooms_never_overlap(monkeypatch: pytest.MonkeyPatch) -> None:
+    # The rectangles handed to _carve are recorded. Tunnel legs are one cell wide, so the rectangles wider and taller than that are the inner areas of the rooms.
+    carved: List[Tuple[np.ndarray, ...]] = []
+    carve = batch_procgen._carve
+
+    def record(maps: np.ndarray, *rectangles: np.ndarray) -> None:
+        carved.append(rectangles)
+        carve(maps, *rectangles)
+
+    monkeypatch.setattr(batch_procgen, "_carve", record)
+    generate_dungeon_batch(20, rng=1, **SETTINGS)
+    n, left, right, top, bottom = (np.concatenate(column) for column in zip(*carved))
+    room = (right > left) & (bottom > top)
+    assert room.any()
+    # The room walls, one cell around the inner area, tested like RectangularRoom.intersects.
+    n, x1, x2, y1, y2 = n[room], left[room] - 1, right[room] + 1, top[room] - 1, bottom[room] + 1
+    for i in range(len(n)):
+        same_map = n == n[i]
+        same_map[i] = False
+        overlaps = (x1 <= x2[i]) & (x2 >= x1[i]) & (y1 <= y2[i]) & (y2 >= y1[i])
+        assert not (overlaps & same_map).any()
+
+
+def test_carve_matches_slices() -> None:
+    rng = np.random.default_rng(0)
+    maps = np.zeros((4, 30, 20), dtype=tile_types.tile_id_dt)
+    expected = np.full(maps.shape, tile_types.wall_id, dtype=tile_types.tile_id_dt)
+    n = rng.integers(4, size=40)
+    left, top = rng.integers(30, size=40), rng.integers(20, size=40)
+    right = np.minimum(left + rng.integers(0, 8, size=40), 29)
+    bottom = np.minimum(top + rng.integers(0, 8, size=40), 19)
+    for i in range(40):
+        expected[n[i], left[i]:right[i] + 1, top[i]:bottom[i] + 1] = tile_types.floor_id
+    batch_procgen._carve(maps, n, left, right, top, bottom)
+    assert np.array_equal(maps, expected)
+
+
+def test_carving_in_batches_gives_the_same_maps(monkeypatch: pytest.MonkeyPatch) -> None:
+    maps, starts = generate_dungeon_batch(7, rng=2, **SETTINGS)
+    monkeypatch.setattr(batch_procgen, "CARVE_BATCH_SIZE", 3)
+    out = np.zeros((7, 80, 50), dtype=tile_types.tile_id_dt)
+    batched, batched_starts = generate_dungeon_batch(7, rng=2, out=out, **SETTINGS)
+    assert batched is out
+    assert np.array_equal(batched, maps)
+    assert np.array_equal(batched_starts, starts)
+
+
+@pytest.mark.parametrize("out", [np.zeros((3, 80, 49), dtype=np.uint8), np.zeros((3, 80, 50), dtype=np.int32)])
+def test_wrong_out_is_refused(out: np.ndarray) -> None:
+    with pytest.raises(ValueError):
+        generate_dungeon_batch(3, rng=0, out=out, **SETTINGS)
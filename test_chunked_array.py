@@ -0,0 +1,99 @@
+# Tests for the chunked map backend: every kind of index ChunkedArray supports is read and written on a ChunkedArray and a numpy array side by side, and both must hold the same cells afterwards. A dungeon generated on the chunked backend must be the same as the dense one from the same seed.
+from __future__ import annotations
+
+from typing import Any, Callable, List
+
+import numpy as np  # type: ignore
+import pytest
+
+import tile_types
+from chunked_array import ChunkedArray
+from entity import Entity
+from procgen import generate_dungeon
+
+WIDTH, HEIGHT = 37, 29
+CHUNK_SIZE = 8
+
+
+# Each of these makes a random index of one kind, for an array of shape (WIDTH, HEIGHT).
+INDEXES: List[Callable[[np.random.Generator], Any]] = [
+    lambda rng: (int(rng.integers(WIDTH)), int(rng.integers(HEIGHT))),
+    lambda rng: (int(rng.integers(-WIDTH, 0)), int(rng.integers(-HEIGHT, 0))),
+    lambda rng: (slice(*sorted(rng.integers(-WIDTH, WIDTH, 2))), slice(*sorted(rng.integers(0, HEIGHT, 2)))),
+    lambda rng: (slice(None), int(rng.integers(HEIGHT))),
+    lambda rng: int(rng.integers(WIDTH)),
+    lambda rng: (slice(1, None, 3), slice(None, None, 2)),
+    lambda rng: (rng.integers(WIDTH, size=12), rng.integers(HEIGHT, size=12)),
+    lambda rng: (rng.integers(WIDTH, size=(3, 4)), int(rng.integers(HEIGHT))),
+    lambda rng: (rng.integers(WIDTH, size=5), slice(2, 9)),
+    lambda rng: (slice(3, 7), rng.integers(HEIGHT, size=4)),
+    lambda rng: rng.random((WIDTH, HEIGHT)) < 0.2,
+    lambda rng: Ellipsis,
+]
+
+
+@pytest.mark.parametrize("make_index", INDEXES)
+def test_reads_and_writes_match_numpy(make_index: Callable[[np.random.Generator], Any]) -> None:
+    rng = np.random.default_rng(0)
+    dense = np.full((WIDTH, HEIGHT), 7, dtype=np.int16)
+    chunked = ChunkedArray((WIDTH, HEIGHT), np.int16, 7, CHUNK_SIZE)
+    for _ in range(50):
+        index = make_index(rng)
+        assert np.array_equal(chunked[index], dense[index])
+        # A single value, or one value per selected cell.
+        if rng.random() < 0.5:
+            value: Any = int(rng.integers(0, 3)) * 7
+        else:
+            value = rng.integers(0, 100, size=np.shape(dense[index])).astype(np.int16)
+        dense[index] = value
+        chunked[index] = value
+        assert np.array_equal(np.asarray(chunked), dense)
+
+
+def test_unwritten_chunks_are_not_allocated() -> None:
+    chunked = ChunkedArray((WIDTH, HEIGHT), np.int16, 7, CHUNK_SIZE)
+    chunked[:, :] = 7
+    chunked[np.array([0, 30]), np.array([0, 20])] = 7
+    assert not chunked.chunks
+    chunked[9, 9] = 1
+    assert list(chunked.chunks) == [(1, 1)]
+    assert chunked[10:20, 5:12].shape == (10, 7)
+
+
+def test_fields_of_structured_arrays() -> None:
+    dense = np.full((WIDTH, HEIGHT), tile_types.wall, order="F")
+    chunked = ChunkedArray((WIDTH, HEIGHT), tile_types.tile_dt, tile_types.wall, CHUNK_SIZE)
+    for target in (dense, chunked):
+        target[2:12, 3:9] = tile_types.floor
+        target["walkable"][5, 5] = False
+    assert np.array_equal(np.asarray(chunked), dense)
+    assert np.array_equal(np.asarray(chunked["walkable"]), dense["walkable"])
+    assert chunked["walkable"][5, 5] == dense["walkable"][5, 5]
+
+
+def test_out_of_bounds_indexes_raise() -> None:
+    chunked = ChunkedArray((WIDTH, HEIGHT), np.int16, 7, CHUNK_SIZE)
+    for index in [(WIDTH, 0), (0, -HEIGHT - 1), (np.array([0, WIDTH]), np.array([0, 0]))]:
+        with pytest.raises(IndexError):
+            chunked[index]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_chunked_dungeon_matches_dense(seed: int) -> None:
+    maps = []
+    for chunk_size in (None, 16):
+        player = Entity(0, 0, "@", (255, 255, 255))
+        game_map = generate_dungeon(
+            max_rooms=30,
+            room_min_size=6,
+            room_max_size=10,
+            map_width=80,
+            map_height=50,
+            player=player,
+            chunk_size=chunk_size,
+            rng=seed,
+        )
+        maps.append((np.asarray(game_map.tiles), (player.x, player.y)))
+    (dense, dense_start), (chunked, chunked_start) = maps
+    assert np.array_equal(chunked, dense)
+    assert chunked_start == dense_start
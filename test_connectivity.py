@@ -0,0 +1,103 @@
+# Tests for connectivity: label_regions against a breadth first search on random masks, label_chunked_regions against label_regions, and the region cache of GameMap as tiles are written.
+from __future__ import annotations
+
+from collections import deque
+
+import numpy as np  # type: ignore
+import pytest
+
+import tile_types
+from chunked_array import ChunkedArray
+from connectivity import NO_REGION, keep_largest_region, label_chunked_regions, label_regions
+from game_map import GameMap
+
+
+# Labels the regions one cell at a time, numbering them in the order label_regions promises: first met scanning x, then y.
+def bfs_regions(walkable: np.ndarray) -> np.ndarray:
+    width, height = walkable.shape
+    regions = np.full(walkable.shape, NO_REGION, dtype=np.int32)
+    count = 0
+    for x in range(width):
+        for y in range(height):
+            if not walkable[x, y] or regions[x, y] != NO_REGION:
+                continue
+            regions[x, y] = count
+            queue = deque([(x, y)])
+            while queue:
+                cx, cy = queue.popleft()
+                for nx, ny in ((cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1)):
+                    if 0 <= nx < width and 0 <= ny < height and walkable[nx, ny] and regions[nx, ny] == NO_REGION:
+                        regions[nx, ny] = count
+                        queue.append((nx, ny))
+            count += 1
+    return regions
+
+
+# Chunked labels are numbered in a different order, so they only have to split the cells into the same regions.
+def assert_same_regions(expected: np.ndarray, actual: np.ndarray) -> None:
+    assert np.array_equal(expected == NO_REGION, actual == NO_REGION)
+    walkable = expected != NO_REGION
+    pairs = np.unique(np.stack([expected[walkable], actual[walkable]]), axis=1)
+    assert len(np.unique(pairs[0])) == pairs.shape[1] == len(np.unique(pairs[1]))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_labels_match_bfs(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    for _ in range(10):
+        width, height = rng.integers(1, 40, 2)
+        walkable = rng.random((width, height)) < rng.uniform(0.2, 0.9)
+        regions, sizes = label_regions(walkable)
+        assert np.array_equal(regions, bfs_regions(walkable))
+        assert np.array_equal(sizes, np.bincount(regions[walkable], minlength=len(sizes)))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_chunked_labels_match_dense(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    for _ in range(10):
+        width, height = rng.integers(1, 70, 2)
+        walkable = ChunkedArray((width, height), bool, False, int(rng.integers(1, 12)))
+        walkable[rng.random((width, height)) < rng.uniform(0.2, 0.9)] = True
+        dense = np.asarray(walkable)
+        expected, expected_sizes = label_regions(dense)
+        regions, sizes = label_chunked_regions(walkable)
+        assert_same_regions(expected, np.asarray(regions))
+        assert sorted(sizes.tolist()) == sorted(expected_sizes.tolist())
+        # Unallocated chunks of the mask stay unallocated in the labels.
+        assert set(regions.chunks) <= set(walkable.chunks)
+
+
+def test_chunked_labels_need_a_blocked_fill_value() -> None:
+    with pytest.raises(ValueError):
+        label_chunked_regions(ChunkedArray((10, 10), bool, True, 4))
+
+
+@pytest.mark.parametrize("chunk_size", [None, 8])
+def test_reachability_follows_writes(chunk_size: int) -> None:
+    game_map = GameMap(40, 30, chunk_size=chunk_size)
+    game_map.tiles[1:10, 1:10] = tile_types.floor
+    game_map.tiles[20:30, 5:25] = tile_types.floor
+    assert not game_map.is_reachable((2, 2), (25, 20))
+    assert not game_map.is_reachable((0, 0), (0, 0))
+
+    game_map.tiles[9:21, 5] = tile_types.floor
+    assert game_map.is_reachable((2, 2), (25, 20))
+    # Floor written over floor doesn't change the walkable mask, so the labels are kept.
+    regions = game_map.regions
+    game_map.tiles[2:4, 2:4] = tile_types.floor
+    assert game_map.regions is regions
+
+    game_map.tiles[15, 5] = tile_types.wall
+    assert not game_map.is_reachable((2, 2), (25, 20))
+    assert sorted(game_map.region_sizes.tolist()) == [81 + 5, 200 + 4]
+
+
+@pytest.mark.parametrize("chunk_size", [None, 8])
+def test_keep_largest_region(chunk_size: int) -> None:
+    game_map = GameMap(50, 40, chunk_size=chunk_size)
+    game_map.tiles[1:5, 1:5] = tile_types.floor
+    game_map.tiles[10:30, 10:20] = tile_types.floor
+    keep_largest_region(game_map)
+    assert game_map.region_sizes.tolist() == [200]
+    assert not np.asarray(game_map.walkable)[1:5, 1:5].any()
@@ -0,0 +1,32 @@
+# Tests for frame_timer: every frame of a headless run is recorded, the last one included, whether it was rendered or not.
+from __future__ import annotations
+
+import pytest
+import tcod.event
+
+from frame_timer import FrameTimer
+from headless import ScriptedEventSource, key_events, offscreen_console, run_headless
+from main import new_engine
+
+
+@pytest.mark.parametrize("render", [False, True])
+def test_headless_run_records_every_frame(render: bool) -> None:
+    timer = FrameTimer()
+    engine = new_engine(0, timer=timer, prefetch=False)
+    console = offscreen_console(80, 50) if render else None
+    frames = run_headless(engine, ScriptedEventSource(key_events([tcod.event.K_LEFT] * 5)), console)
+    assert frames == 5
+    assert timer.count == 5
+    assert timer.to_dict()["frames"] == 5
+    assert (timer.frames()[:, 0] > 0).all()
+
+
+def test_end_frame_stores_the_frame_once() -> None:
+    timer = FrameTimer()
+    timer.end_frame()
+    assert timer.count == 0
+    timer.begin_frame()
+    timer.lap("handle_events")
+    timer.end_frame()
+    timer.end_frame()
+    assert timer.count == 1
@@ -0,0 +1,68 @@
+# Tests for the GameMap masks: after tile writes of every index kind, on both backends, the walkable and transparent masks patched by the writes must equal a fresh lookup of the tile IDs, and their versions only move when a write changes them.
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import numpy as np  # type: ignore
+import pytest
+
+import tile_types
+from game_map import GameMap
+
+
+def random_key(rng: np.random.Generator) -> Any:
+    x, y = int(rng.integers(40)), int(rng.integers(30))
+    kind = rng.integers(5)
+    if kind == 0:
+        return x, y
+    if kind == 1:
+        return slice(x, x + 5), slice(y, y + 3)
+    if kind == 2:
+        mask = np.zeros((40, 30), dtype=bool)
+        mask[rng.integers(40, size=5), rng.integers(30, size=5)] = True
+        return mask
+    if kind == 3:
+        return rng.integers(40, size=6), rng.integers(30, size=6)
+    return x, slice(None)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 8])
+def test_masks_follow_writes(chunk_size: Optional[int]) -> None:
+    rng = np.random.default_rng(0)
+    game_map = GameMap(40, 30, chunk_size=chunk_size)
+    # Built before the writes, so every write has to patch them.
+    game_map.walkable, game_map.transparent
+    for _ in range(300):
+        game_map.tiles[random_key(rng)] = tile_types.floor if rng.random() < 0.5 else tile_types.wall
+        ids = np.asarray(game_map.tile_ids)
+        assert np.array_equal(np.asarray(game_map.walkable), tile_types.walkable_lut[ids])
+        assert np.array_equal(np.asarray(game_map.transparent), tile_types.transparent_lut[ids])
+        assert np.array_equal(game_map.walkable_packed, np.packbits(tile_types.walkable_lut[ids], axis=1))
+    if chunk_size is not None:
+        assert set(game_map.walkable.chunks) == set(game_map.tile_ids.chunks)
+
+
+def test_versions_move_only_when_a_mask_changes() -> None:
+    game_map = GameMap(40, 30)
+    game_map.tiles[0:5, 0:5] = tile_types.floor
+    # The version counts changes to the mask, which is only built when it is first read.
+    game_map.walkable
+    version, map_version = game_map.walkable_version, game_map.version
+    game_map.tiles[0:5, 0:5] = tile_types.floor
+    assert game_map.walkable_version == version
+    assert game_map.version == map_version + 1
+    game_map.tiles[2, 2] = tile_types.wall
+    assert game_map.walkable_version == version + 1
+
+
+@pytest.mark.parametrize("chunk_size", [None, 8])
+def test_tiles_registered_after_import(chunk_size: Optional[int]) -> None:
+    game_map = GameMap(40, 30, chunk_size=chunk_size)
+    game_map.tiles[1:5, 1:5] = tile_types.floor
+    # Built before the new tile exists, so the write has to patch it with the new lookup tables.
+    game_map.walkable
+    stairs = tile_types.new_tile(walkable=True, transparent=True, dark=(ord(">"), (255, 255, 255), (50, 50, 150)))
+    game_map.tiles[2, 2] = stairs
+    game_map.tiles[20, 20] = stairs
+    assert game_map.walkable[2, 2] and game_map.walkable[20, 20]
+    assert game_map.transparent[20, 20]
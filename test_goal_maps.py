@@ -0,0 +1,45 @@
+# Tests for goal_maps: following next_step from any cell must walk to the nearest goal in exactly `distance` moves, next_steps must give the same moves as next_step, and the cache must only compute a map again when the walkable mask changes.
+from __future__ import annotations
+
+import numpy as np  # type: ignore
+import pytest
+
+import tile_types
+from game_map import GameMap
+from goal_maps import UNREACHABLE, GoalMap
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_steps_walk_down_the_distances(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    walkable = rng.random((30, 20)) < 0.7
+    # Goals stand on walkable cells, like the player does.
+    walkable[0, 0] = walkable[15, 10] = True
+    goals = ((15, 10), (0, 0))
+    goal_map = GoalMap(walkable, goals)
+    xs, ys = np.nonzero(walkable)
+    steps = goal_map.next_steps(xs, ys)
+    for x, y, step in zip(xs.tolist(), ys.tolist(), steps.tolist()):
+        distance = int(goal_map.distance[x, y])
+        move = goal_map.next_step(x, y)
+        assert (move or (0, 0)) == tuple(step)
+        if distance in (0, UNREACHABLE):
+            assert move is None
+            continue
+        for _ in range(distance):
+            x, y = x + move[0], y + move[1]
+            assert walkable[x, y]
+            move = goal_map.next_step(x, y)
+        assert (x, y) in goals
+
+
+def test_cached_until_the_walkable_mask_changes() -> None:
+    game_map = GameMap(20, 10)
+    game_map.tiles[1:19, 1:9] = tile_types.floor
+    goal_map = game_map.goal_maps.get([(5, 5)])
+    assert game_map.goal_maps.get([(5, 5), (5, 5)]) is goal_map
+    game_map.tiles[2, 2] = tile_types.floor
+    assert game_map.goal_maps.get([(5, 5)]) is goal_map
+    game_map.tiles[2, 2] = tile_types.wall
+    assert game_map.goal_maps.get([(5, 5)]) is not goal_map
+    assert game_map.goal_maps.next_step(7, 5, [(5, 5)]) == (-1, 0)
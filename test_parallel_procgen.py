@@ -0,0 +1,28 @@
+# Tests for parallel_procgen: the maps the process pool writes into shared memory must be the maps generate_dungeon makes one at a time from the same seeds.
+from __future__ import annotations
+
+import numpy as np  # type: ignore
+
+from entity import Entity
+from parallel_procgen import generate_dungeons
+from procgen import generate_dungeon
+
+SETTINGS = dict(max_rooms=30, room_min_size=6, room_max_size=10, map_width=80, map_height=50)
+
+
+def test_parallel_maps_match_serial() -> None:
+    seeds = [0, 1, 2, 3, 4, 2**40, 7]
+    # Small tasks, so the maps are spread over several tasks and both workers.
+    maps, starts = generate_dungeons(seeds, workers=2, jobs_per_task=2, **SETTINGS)
+    assert maps.shape == (len(seeds), 80, 50)
+    for i, seed in enumerate(seeds):
+        player = Entity(0, 0, "@", (255, 255, 255))
+        dungeon = generate_dungeon(player=player, rng=seed, **SETTINGS)
+        assert np.array_equal(maps[i], dungeon.tile_ids)
+        assert tuple(starts[i]) == (player.x, player.y)
+
+
+def test_no_seeds() -> None:
+    maps, starts = generate_dungeons([], **SETTINGS)
+    assert maps.shape == (0, 80, 50)
+    assert starts.shape == (0, 2)
@@ -0,0 +1,100 @@
+# Tests for path_cache: after random tile writes of every index kind, on both map backends, every path GameMap.path returns must be as long as the one a fresh tcod.path.AStar search finds, and must be walkable on the map as it is now.
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import numpy as np  # type: ignore
+import pytest
+import tcod.path
+
+import tile_types
+from entity import Entity
+from game_map import GameMap
+from map_generators import GENERATORS
+
+
+def fresh_path(game_map: GameMap, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+    cost = np.asarray(game_map.walkable).astype(np.int8)
+    return tcod.path.AStar(cost, diagonal=0).get_path(*start, *goal)
+
+
+def random_write(game_map: GameMap, rng: np.random.Generator) -> None:
+    x, y = int(rng.integers(1, 78)), int(rng.integers(1, 48))
+    tile = tile_types.floor if rng.random() < 0.5 else tile_types.wall
+    kind = rng.random()
+    if kind < 0.4:
+        game_map.tiles[x, y] = tile
+    elif kind < 0.7:
+        game_map.tiles[x:x + 3, y:y + 2] = tile
+    elif kind < 0.9:
+        mask = np.zeros((80, 50), dtype=bool)
+        mask[rng.integers(80, size=3), rng.integers(50, size=3)] = True
+        game_map.tiles[mask] = tile
+    else:
+        game_map.tiles[np.array([x, x + 1]), np.array([y, y])] = tile
+
+
+@pytest.mark.parametrize("chunk_size", [None, 16])
+@pytest.mark.parametrize("generator", ["rooms", "cellular"])
+def test_paths_match_fresh_astar_after_writes(generator: str, chunk_size: Optional[int]) -> None:
+    rng = np.random.default_rng(0)
+    game_map = GENERATORS[generator](80, 50, Entity(0, 0, "@", (0, 0, 0)), rng=1, chunk_size=chunk_size)
+    floor = np.argwhere(np.asarray(game_map.walkable))
+    points = [(int(x), int(y)) for x, y in floor[rng.integers(len(floor), size=8)]]
+    pairs = [(a, b) for a in points[:4] for b in points[4:]]
+    for _ in range(40):
+        walkable = np.asarray(game_map.walkable)
+        for start, goal in pairs:
+            path = game_map.path(start, goal)
+            assert len(path) == len(fresh_path(game_map, start, goal))
+            assert all(walkable[cell] for cell in path)
+            if path:
+                assert abs(path[0][0] - start[0]) + abs(path[0][1] - start[1]) == 1
+                assert path[-1] == goal
+        random_write(game_map, rng)
+    assert game_map.paths.hits > 0
+
+
+def test_unrelated_writes_keep_paths() -> None:
+    game_map = GameMap(40, 30)
+    game_map.tiles[1:20, 1:4] = tile_types.floor
+    game_map.tiles[30:35, 20:25] = tile_types.floor
+    path = game_map.path((1, 1), (18, 1))
+    assert len(path) == 17
+    # Floor over floor, and a wall far from the path's cells, don't drop it.
+    game_map.tiles[1:20, 1:4] = tile_types.floor
+    game_map.tiles[32, 22] = tile_types.wall
+    assert game_map.path((1, 1), (18, 1)) == path
+    assert game_map.paths.invalidated == 0
+
+    game_map.tiles[10, 1] = tile_types.wall
+    assert game_map.paths.invalidated == 1
+    assert len(game_map.path((1, 1), (18, 1))) == 19
+
+
+def test_evicted_paths_leave_the_index() -> None:
+    game_map = GameMap(40, 30)
+    game_map.paths.max_size = 3
+    game_map.tiles[1:39, 1:29] = tile_types.floor
+    for x in range(2, 12):
+        game_map.path((1, 1), (x, 20))
+    assert len(game_map.paths) == 3
+    users = set().union(*game_map.paths._users.values())
+    assert users == set(game_map.paths)
+    game_map.paths.clear()
+    assert len(game_map.paths) == 0 and not game_map.paths._users
+    assert game_map.paths.hits == game_map.paths.misses == 0
+
+
+# The search starts in a small window around the ends and grows it, so on a bigger map the paths between far apart cells (and to cells which can't be reached) must still be the shortest ones.
+@pytest.mark.parametrize("generator", ["rooms", "cellular"])
+def test_far_paths_on_a_big_map(generator: str) -> None:
+    rng = np.random.default_rng(0)
+    game_map = GENERATORS[generator](300, 200, Entity(0, 0, "@", (0, 0, 0)), rng=2, chunk_size=32)
+    cost = np.asarray(game_map.walkable).astype(np.int8)
+    astar = tcod.path.AStar(cost, diagonal=0)
+    floor = np.argwhere(cost)
+    for _ in range(20):
+        start, goal = (tuple(int(v) for v in floor[i]) for i in rng.integers(len(floor), size=2))
+        assert len(game_map.path(start, goal)) == len(astar.get_path(*start, *goal))
+    assert game_map.path(start, (0, 0)) == []
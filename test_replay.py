@@ -0,0 +1,50 @@
+# Tests for replay: a session recorded while it is played, stairs down included, must end in the same place on the same floor when the recording is decoded and played back on a new engine, and the command line must refuse a repeat count below 1.
+from __future__ import annotations
+
+import sys
+
+import numpy as np  # type: ignore
+import pytest
+import tcod.event
+
+import replay
+from headless import key_events
+from main import new_engine
+
+SEED = 7
+
+
+def test_replay_matches_the_live_session() -> None:
+    walk = [tcod.event.K_LEFT] * 3 + [tcod.event.K_UP] * 2 + [tcod.event.K_RIGHT, tcod.event.K_DOWN]
+    descend = tcod.event.KeyDown(scancode=0, sym=tcod.event.K_PERIOD, mod=tcod.event.KMOD_LSHIFT)
+    events = key_events(walk) + [descend] + key_events(walk)
+
+    # The live session runs like the game does, with the next floor generated in the background, and every event is recorded as it is handled.
+    live = new_engine(SEED)
+    recorder = replay.InputRecorder(SEED)
+    try:
+        start_map = live.game_map
+        for event in events:
+            live.handle_events(recorder.record([event]))
+        assert live.game_map is not start_map
+    finally:
+        live.prefetcher.close()
+
+    recording = replay.decode(recorder.to_bytes())
+    assert recording.seed == SEED and len(recording.events) == len(events)
+    replayed = new_engine(recording.seed, prefetch=False)
+    try:
+        assert replay.play(replayed, recording) == len(events)
+    finally:
+        replayed.prefetcher.close()
+
+    assert (replayed.player.x, replayed.player.y) == (live.player.x, live.player.y)
+    assert np.array_equal(np.asarray(replayed.game_map.tile_ids), np.asarray(live.game_map.tile_ids))
+
+
+@pytest.mark.parametrize("repeat", ["0", "-1"])
+def test_repeat_below_one_is_refused(repeat: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(sys, "argv", ["replay.py", "unused.rec", "--repeat", repeat])
+    with pytest.raises(SystemExit) as exit_info:
+        replay.main()
+    assert exit_info.value.code == 2
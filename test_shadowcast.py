@@ -0,0 +1,44 @@
+# Tests for shadowcast: shadowcast_batch must see exactly the cells tcod.map.compute_fov sees with FOV_SYMMETRIC_SHADOWCAST, on random masks and generated maps, with and without a radius.
+from __future__ import annotations
+
+import numpy as np  # type: ignore
+import pytest
+import tcod
+
+from entity import Entity
+from map_generators import GENERATORS
+from shadowcast import shadowcast_batch
+
+
+def tcod_fov(transparent: np.ndarray, origin: np.ndarray, radius: int) -> np.ndarray:
+    return tcod.map.compute_fov(transparent, tuple(origin), radius, True, tcod.FOV_SYMMETRIC_SHADOWCAST)
+
+
+@pytest.mark.parametrize("radius", [0, 1, 5, 9])
+def test_random_masks_match_tcod(radius: int) -> None:
+    rng = np.random.default_rng(radius)
+    masks = rng.random((64, 31, 23)) < rng.uniform(0.4, 0.95, (64, 1, 1))
+    # Viewers anywhere, walls and map edges included.
+    origins = np.stack([rng.integers(31, size=64), rng.integers(23, size=64)], axis=1)
+    visible = shadowcast_batch(masks, origins, radius)
+    for i in range(64):
+        assert np.array_equal(visible[i], tcod_fov(masks[i], origins[i], radius)), i
+
+
+@pytest.mark.parametrize("generator", sorted(GENERATORS))
+def test_shared_generated_map_matches_tcod(generator: str) -> None:
+    rng = np.random.default_rng(0)
+    transparent = np.asarray(GENERATORS[generator](80, 50, Entity(0, 0, "@", (0, 0, 0)), rng=rng).transparent)
+    floor = np.argwhere(transparent)
+    origins = floor[rng.integers(len(floor), size=32)]
+    for radius in (0, 8):
+        visible = shadowcast_batch(transparent, origins, radius)
+        assert visible.shape == (32, 80, 50)
+        for i in range(32):
+            assert np.array_equal(visible[i], tcod_fov(transparent, origins[i], radius))
+
+
+def test_open_map() -> None:
+    transparent = np.ones((15, 11), dtype=bool)
+    visible = shadowcast_batch(transparent, np.array([[7, 5]]))
+    assert visible.all()
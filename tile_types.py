@@ -1,5 +1,5 @@
 # Imports the Tuple type from the typing module. A tuple is an ordered collection of elements, enclosed in parentheses '()'. It is an immutable data type, meaning its elements cannot be modified once the tuple is created. Tuples can contain elements of different types, such as integers, floats, strings, boolean, or even other tuples.
-from typing import Tuple
+from typing import Any, Dict, List, Tuple
 
 # This imports numpy as the variable 'np' and the '# type: ignore' comment tells the type checker to ignore any type errors raised by the import statement
 import numpy as np  # type: ignore
@@ -36,7 +36,85 @@ def new_tile(
     """Helper function for defining individual tile types """
 
     # np.array is a function of numpy that creates a new numpy array object from given input data. It can take various data types such as tuples, list, or other array-like objects and convert them into numpy arrays. The 'tile_dt' data type is passed as the 'dtype' argument to the np.array function. The 'dtype' argument specifies the data type of the array's elements.
-    return np.array((walkable, transparent, dark), dtype=tile_dt)
+    tile = np.array((walkable, transparent, dark), dtype=tile_dt)
+
+    # Every tile type gets an ID in the tile registry as soon as it is defined, so it can be stored in a GameMap.
+    register_tile(tile)
+    return tile
+
+
+# Tile registry. A GameMap doesn't store a full copy of 'tile_dt' (12 bytes) in every cell, it stores a small integer ID (1 byte) for each cell and looks the tile properties up in the tables below. For example 'walkable_lut[ids]' turns an array of IDs into an array of walkable flags in one numpy operation.
+
+# The numpy dtype of the tile IDs stored in a GameMap. uint8 allows for 256 different tile types.
+tile_id_dt = np.dtype(np.uint8)
+
+# The registered tile types, the index of a tile in this list is its ID.
+registered_tiles: List[np.ndarray] = []
+
+# Maps the raw bytes of a registered tile to its ID, so the ID of a tile can be found without comparing it against every registered tile.
+_ids_by_bytes: Dict[bytes, int] = {}
+
+# Lookup tables indexed by tile ID. 'tile_lut' holds the full 'tile_dt' of every tile type, the others hold contiguous copies of a single field so looking them up doesn't have to stride over the other fields. They are rebuilt every time a tile is registered.
+tile_lut = np.zeros(0, dtype=tile_dt)
+walkable_lut = np.zeros(0, dtype=bool)
+transparent_lut = np.zeros(0, dtype=bool)
+dark_lut = np.zeros(0, dtype=graphic_dt)
+
+
+def register_tile(tile: np.ndarray) -> int:
+    """Add a tile type to the registry and return its ID.
+
+    Registering the same tile twice returns the ID it already has.
+    """
+    global tile_lut, walkable_lut, transparent_lut, dark_lut
+    tile = np.asarray(tile, dtype=tile_dt)
+    key = tile.tobytes()
+    if key in _ids_by_bytes:
+        return _ids_by_bytes[key]
+    if len(registered_tiles) > np.iinfo(tile_id_dt).max:
+        raise ValueError(f"Only {np.iinfo(tile_id_dt).max + 1} tile types can be registered.")
+    _ids_by_bytes[key] = len(registered_tiles)
+    registered_tiles.append(tile)
+
+    tile_lut = np.array(registered_tiles, dtype=tile_dt)
+    walkable_lut = np.ascontiguousarray(tile_lut["walkable"])
+    transparent_lut = np.ascontiguousarray(tile_lut["transparent"])
+    dark_lut = np.ascontiguousarray(tile_lut["dark"])
+    return _ids_by_bytes[key]
+
+
+def field_lut(name: str) -> np.ndarray:
+    """Return the lookup table for a single `tile_dt` field, indexed by tile ID."""
+    if name == "walkable":
+        return walkable_lut
+    if name == "transparent":
+        return transparent_lut
+    if name == "dark":
+        return dark_lut
+    return np.ascontiguousarray(tile_lut[name])
+
+
+def tile_ids_of(value: Any) -> Any:
+    """Convert tiles (a single `tile_dt` or an array of them) into tile IDs.
+
+    Integer values are assumed to already be tile IDs and are returned as is.
+    """
+    value = np.asarray(value)
+    if value.dtype != tile_dt:
+        return value.astype(tile_id_dt, copy=False)
+    if value.ndim == 0:
+        return _tile_id(value)
+    # Only the distinct tiles are looked up, then every cell is mapped to the ID of its tile.
+    unique, inverse = np.unique(value.reshape(-1).view(np.dtype((np.void, tile_dt.itemsize))), return_inverse=True)
+    ids = np.array([_tile_id(u.view(tile_dt)) for u in unique], dtype=tile_id_dt)
+    return ids[inverse.reshape(-1)].reshape(value.shape)
+
+
+def _tile_id(tile: np.ndarray) -> int:
+    try:
+        return _ids_by_bytes[np.asarray(tile, dtype=tile_dt).tobytes()]
+    except KeyError:
+        raise ValueError(f"{tile!r} is not a registered tile type.") from None
 
 # These methods construct the individual tile types using the 'new_tile' method and the 'tile_dt' data type structure.
 floor = new_tile(
@@ -44,4 +122,8 @@ floor = new_tile(
 )
 wall = new_tile(
     walkable=False, transparent=False, dark=(ord("#"), (255, 229, 204), (102, 0, 0)),
-)
\ No newline at end of file
+)
+
+# The registry IDs of the tile types above, which is what a GameMap actually stores.
+floor_id = register_tile(floor)
+wall_id = register_tile(wall)
\ No newline at end of file
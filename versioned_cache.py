@@ -0,0 +1,80 @@
+# The least recently used cache behind the GameMap's caches of field of view, goal maps and paths. Each of them keeps the results worked out from the map as it was at one version, and throws them all away once the map data they were computed from changes.
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Iterator, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class VersionedCache(Generic[K, V]):
+    """A least recently used cache which empties itself when a version changes.
+
+    `version` returns the version of the data the cached values are computed
+    from, and is checked on every `lookup`. Without it the cache is only
+    emptied by `invalidate` and `clear`. At most `max_size` values are kept,
+    dropping the least recently used one.
+    """
+
+    def __init__(self, max_size: int, version: Optional[Callable[[], int]] = None):
+        self.max_size = max_size
+        self._version_of = version
+        self._version = version() if version is not None else None
+        self._entries: OrderedDict[K, V] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: K) -> Optional[V]:
+        """Return the value cached for `key`, or None, and count the hit or miss."""
+        if self._version_of is not None:
+            version = self._version_of()
+            if version != self._version:
+                # The version only goes up, so values from older versions can never be used again.
+                self.invalidate()
+                self._version = version
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def store(self, key: K, value: V) -> V:
+        """Cache `value` for `key` and return it."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._evicted(*self._entries.popitem(last=False))
+        return value
+
+    def discard(self, key: K) -> Optional[V]:
+        """Drop the value cached for `key` and return it, or None if there was none."""
+        return self._entries.pop(key, None)
+
+    # Subclasses which keep more state about their values (like an index of them) override this to forget a value the cache had to drop to make room.
+    def _evicted(self, key: K, value: V) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of lookups that were answered from the cache."""
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def invalidate(self) -> None:
+        """Drop every cached value, keeping the counters."""
+        self._entries.clear()
+
+    def clear(self) -> None:
+        """Drop every cached value and reset the counters."""
+        self.invalidate()
+        self.hits = self.misses = 0